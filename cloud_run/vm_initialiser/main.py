@@ -116,22 +116,34 @@ def pubsub_handler():
         INSTANCE_NAME=SCRIPT_NAME.split(".")[0].replace("_", "-")
         CONTAINER_IMAGE=f"europe-west2-docker.pkg.dev/checkmate-453316/docker-chess-repo/{JOB_NAME}:latest"
 
-        # Run function for initialising VM with workload
-        logger.log_text(f"Running VM initialiser script for cloud scheduler job: {SCRIPT_NAME}...using docker image {CONTAINER_IMAGE}", severity="INFO")
-
-        vm_creator = create_instance_with_container(
-            logger,
-            INSTANCE_NAME,
-            PROJECT_ID,
-            MESSAGE_DATA,
-            CONTAINER_IMAGE,
-            SUB_NET,
-            SERVICE_ACCOUNT,
-            MACHINE_TYPE,
-            BOOT_DISK_SIZE_GB,
-            BOOT_DISK_TYPE,
-            SCOPES
-        )
+        # Sharded jobs get one VM per shard, each told which partition of the players it owns
+        SHARD_COUNT = int(CLOUD_SCHEDULER_DICT.get("shard_count", 1))
+
+        for SHARD_INDEX in range(SHARD_COUNT):
+            if SHARD_COUNT > 1:
+                SHARD_DICT = {**CLOUD_SCHEDULER_DICT, "shard_index": SHARD_INDEX}
+                SHARD_MESSAGE_DATA = base64.b64encode(json.dumps(SHARD_DICT).encode("utf-8")).decode("utf-8")
+                SHARD_INSTANCE_NAME = f"{INSTANCE_NAME}-shard-{SHARD_INDEX}"
+            else:
+                SHARD_MESSAGE_DATA = MESSAGE_DATA
+                SHARD_INSTANCE_NAME = INSTANCE_NAME
+
+            # Run function for initialising VM with workload
+            logger.log_text(f"Running VM initialiser script for cloud scheduler job: {SCRIPT_NAME} (shard {SHARD_INDEX + 1}/{SHARD_COUNT})...using docker image {CONTAINER_IMAGE}", severity="INFO")
+
+            vm_creator = create_instance_with_container(
+                logger,
+                SHARD_INSTANCE_NAME,
+                PROJECT_ID,
+                SHARD_MESSAGE_DATA,
+                CONTAINER_IMAGE,
+                SUB_NET,
+                SERVICE_ACCOUNT,
+                MACHINE_TYPE,
+                BOOT_DISK_SIZE_GB,
+                BOOT_DISK_TYPE,
+                SCOPES
+            )
 
         print("VM Creation Complete!")
 
@@ -5,23 +5,71 @@ Functions for fetching chess game data from Chess.com API and uploading to GCS.
 """
 
 from .chess_ingestion import (
+    CHESS_API_BASE_URL,
     script_date_selection,
     generate_year_month_list,
     get_top_player_list,
+    get_leaderboard_ranks,
+    diff_leaderboard_ranks,
+    record_leaderboard_snapshot,
+    generate_entrant_backfill_combinations,
+    drop_departed_players,
+    select_player_shard,
+    player_endpoint_manifest_name,
+    list_existing_player_endpoints,
+    record_player_endpoints_in_manifest,
     generate_remaining_endpoint_combinations,
     append_player_endpoints_to_https_chess_prefix,
+    AdaptiveRateLimiter,
+    get_chess_api_rate_limiter,
+    RequestTimingStats,
+    get_request_timing_stats,
+    create_chess_api_session,
+    get_chess_api_session,
     exponential_backoff_request,
+    fetch_player_archive_periods,
+    filter_combinations_by_player_archives,
+    IngestionJournal,
+    PlayerPeriodBitmaps,
+    ingestion_journal_name,
     request_from_list_and_upload_to_gcs,
+    request_player_profiles_and_upload_to_gcs,
+    PlayerBloomFilter,
+    crawl_opponent_graph,
 )
 
 __version__ = "0.1.0"
 
 __all__ = [
+    "CHESS_API_BASE_URL",
     "script_date_selection",
     "generate_year_month_list",
     "get_top_player_list",
+    "get_leaderboard_ranks",
+    "diff_leaderboard_ranks",
+    "record_leaderboard_snapshot",
+    "generate_entrant_backfill_combinations",
+    "drop_departed_players",
+    "select_player_shard",
+    "player_endpoint_manifest_name",
+    "list_existing_player_endpoints",
+    "record_player_endpoints_in_manifest",
     "generate_remaining_endpoint_combinations",
     "append_player_endpoints_to_https_chess_prefix",
+    "AdaptiveRateLimiter",
+    "get_chess_api_rate_limiter",
+    "RequestTimingStats",
+    "get_request_timing_stats",
+    "create_chess_api_session",
+    "get_chess_api_session",
     "exponential_backoff_request",
+    "fetch_player_archive_periods",
+    "filter_combinations_by_player_archives",
+    "IngestionJournal",
+    "PlayerPeriodBitmaps",
+    "ingestion_journal_name",
     "request_from_list_and_upload_to_gcs",
+    "request_player_profiles_and_upload_to_gcs",
+    "PlayerBloomFilter",
+    "crawl_opponent_graph",
 ]
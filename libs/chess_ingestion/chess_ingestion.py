@@ -5,15 +5,70 @@ Functions for fetching chess game data from Chess.com API leaderboards
 and player endpoints, with exponential backoff and GCS upload.
 """
 
+import os
 import re
+import json
+import math
 import time
+import zlib
+import base64
+import hashlib
+import tempfile
 import random
+import asyncio
 import requests
-from datetime import date, datetime
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPSConnectionPool
+from urllib3.connection import HTTPSConnection
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from google.cloud.exceptions import NotFound
+from google.api_core.exceptions import PreconditionFailed
+from email.utils import parsedate_to_datetime
 from dateutil.relativedelta import relativedelta
-from itertools import product
+from itertools import product, islice
+from collections import Counter, deque
+from functools import partial
+from types import SimpleNamespace
 
-from gcp_common import upload_json_to_gcs_bucket, log_printer
+from gcp_common import (
+    upload_json_to_gcs_bucket,
+    stat_gcs_object,
+    get_gcs_object_metadata,
+    update_gcs_object_metadata,
+    download_content_from_gcs,
+    get_gcs_upload_byte_counts,
+    list_files_in_gcs,
+    list_files_in_gcs_globs,
+    read_gcs_manifest,
+    update_gcs_manifest,
+    append_to_gcs_object,
+    log_printer,
+)
+
+# Overridable so the whole pipeline can be pointed at a local stand-in server (scripts/chess_api_standin.py)
+CHESS_API_BASE_URL = os.getenv("CHESS_API_BASE_URL", "https://api.chess.com/pub")
+
+PLAYER_ENDPOINT_MANIFEST_PREFIX = "manifests/player_endpoints"
+PLAYER_ARCHIVES_CACHE_PREFIX = "player_archives"
+INGESTION_JOURNAL_PREFIX = "journals/gcs_chess_ingestion"
+ARCHIVE_INCREMENT_DIRECTORY = "increments"
+LEADERBOARD_HISTORY_PREFIX = "leaderboard_history"
+PLAYER_PROFILES_PREFIX = "player_profiles"
+PLAYER_STATS_PREFIX = "player_stats"
+
+# Optional dependencies: brotli adds "br" content decoding, httpx enables HTTP/2
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip, deflate"
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 
 def script_date_selection(gcs_ingestion_settings):
@@ -96,7 +151,247 @@ def get_top_player_list(leaderboard_response, logger):
     return top_player_list
 
 
-def generate_remaining_endpoint_combinations(bucket_name, players_data_in_gcs, top_player_list, year_month_list, logger):
+def get_leaderboard_ranks(leaderboard_response):
+    """
+    Extract each player's rank on every leaderboard format from a leaderboard response.
+
+    Args:
+        leaderboard_response: Response object from Chess.com leaderboard API
+
+    Returns:
+        Dictionary mapping lowercase username to {format: rank}
+    """
+    leaderboard_ranks = {}
+    for form, entries in leaderboard_response.json().items():
+        for position, entry in enumerate(entries, start=1):
+            leaderboard_ranks.setdefault(entry["username"].lower(), {})[form] = entry.get("rank", position)
+    return leaderboard_ranks
+
+
+def diff_leaderboard_ranks(previous_ranks, current_ranks):
+    """
+    Compute the delta between two leaderboard rank snapshots.
+
+    Args:
+        previous_ranks: {username: {format: rank}} of the earlier snapshot
+        current_ranks: {username: {format: rank}} of the later snapshot
+
+    Returns:
+        Dictionary with sorted "entered" and "left" usernames and "rank_changes"
+        mapping username to {format: [previous_rank, current_rank]} (None when off that board)
+    """
+    rank_changes = {}
+    for user in sorted(current_ranks.keys() & previous_ranks.keys()):
+        formats = current_ranks[user].keys() | previous_ranks[user].keys()
+        changes = {
+            form: [previous_ranks[user].get(form), current_ranks[user].get(form)]
+            for form in sorted(formats)
+            if previous_ranks[user].get(form) != current_ranks[user].get(form)
+        }
+        if changes:
+            rank_changes[user] = changes
+
+    return {
+        "entered": sorted(current_ranks.keys() - previous_ranks.keys()),
+        "left": sorted(previous_ranks.keys() - current_ranks.keys()),
+        "rank_changes": rank_changes,
+    }
+
+
+def record_leaderboard_snapshot(bucket_name, leaderboard_response, snapshot_name, logger, persist=True):
+    """
+    Diff the latest leaderboard against the last snapshot from an earlier day and record the delta.
+
+    Full ranks are kept once per day under leaderboard_history/ranks/{YYYY-MM-DD}.json and
+    each run's delta is appended to leaderboard_history/deltas.ndjson. Diffing against the
+    previous day (never today's state) lets every shard of a run derive the same delta.
+
+    Args:
+        bucket_name: GCS bucket name
+        leaderboard_response: Response object from Chess.com leaderboard API
+        snapshot_name: GCS object name of the raw leaderboard snapshot
+        logger: Cloud logging logger instance
+        persist: Write the day's ranks and append the delta (False for secondary shards)
+
+    Returns:
+        Delta dictionary from diff_leaderboard_ranks plus "snapshot" and "previous_snapshot";
+        with no earlier history the delta is empty and marked as the baseline
+    """
+    today_state_name = f"{LEADERBOARD_HISTORY_PREFIX}/ranks/{date.today():%Y-%m-%d}.json"
+    current_ranks = get_leaderboard_ranks(leaderboard_response)
+
+    earlier_states = sorted(name for name in list_files_in_gcs(bucket_name, prefix=f"{LEADERBOARD_HISTORY_PREFIX}/ranks/") if name < today_state_name)
+    if earlier_states:
+        previous_state = json.loads(download_content_from_gcs(earlier_states[-1], bucket_name))
+        delta = {"snapshot": snapshot_name, "previous_snapshot": previous_state["snapshot"], **diff_leaderboard_ranks(previous_state["ranks"], current_ranks)}
+    else:
+        delta = {"snapshot": snapshot_name, "previous_snapshot": None, "entered": [], "left": [], "rank_changes": {}, "baseline": True}
+
+    log_printer(f"Leaderboard delta vs {delta['previous_snapshot']} | Entered: {len(delta['entered'])} | Left: {len(delta['left'])} | Rank changes: {len(delta['rank_changes'])}", logger)
+
+    if persist:
+        try:
+            state = SimpleNamespace(content=json.dumps({"snapshot": snapshot_name, "ranks": current_ranks}).encode("utf-8"))
+            upload_json_to_gcs_bucket(bucket_name, today_state_name, state, logger, raw=True, if_generation_match=0)
+        except PreconditionFailed:
+            log_printer(f"Leaderboard ranks for today already recorded in {today_state_name}", logger)
+        else:
+            append_to_gcs_object(bucket_name, f"{LEADERBOARD_HISTORY_PREFIX}/deltas.ndjson", (json.dumps(delta) + "\n").encode("utf-8"), logger)
+
+    return delta
+
+
+def generate_entrant_backfill_combinations(bucket_name, entrant_list, start_date, backfill_months, logger):
+    """
+    Queue the earlier months still missing for players who just entered the leaderboard.
+
+    Args:
+        bucket_name: GCS bucket name
+        entrant_list: Usernames that entered the leaderboard since the previous snapshot
+        start_date: Start date of the run - backfill covers the months before it
+        backfill_months: Number of months before start_date to backfill
+        logger: Cloud logging logger instance
+
+    Returns:
+        List of endpoint combinations not yet in GCS
+    """
+    if not entrant_list or backfill_months <= 0:
+        return []
+
+    first_month = start_date.replace(day=1)
+    backfill_month_list = generate_year_month_list(first_month - relativedelta(months=backfill_months), first_month - relativedelta(months=1))
+    log_printer(f"Backfilling {len(entrant_list)} leaderboard entrants over {backfill_month_list[0]} - {backfill_month_list[-1]}", logger)
+
+    existing_endpoints = list_existing_player_endpoints(bucket_name, backfill_month_list, logger)
+    return generate_remaining_endpoint_combinations(bucket_name, existing_endpoints, entrant_list, backfill_month_list, logger)
+
+
+def drop_departed_players(remaining_combo_list, departed_list, logger):
+    """
+    Remove endpoint combinations of players who have left the leaderboard.
+
+    Args:
+        remaining_combo_list: List of endpoints in format "player/{user}/games/{YYYY}/{MM}"
+        departed_list: Usernames that left the leaderboard since the previous snapshot
+        logger: Cloud logging logger instance
+
+    Returns:
+        Filtered list of endpoint combinations
+    """
+    departed = set(departed_list)
+    kept_combo_list = [combo for combo in remaining_combo_list if combo.split("/")[1] not in departed]
+    if len(kept_combo_list) < len(remaining_combo_list):
+        log_printer(f"Dropped {len(remaining_combo_list) - len(kept_combo_list)} requests for players who left the leaderboard", logger)
+    return kept_combo_list
+
+
+def player_endpoint_manifest_name(period):
+    """
+    Name of the manifest object indexing fetched player endpoints for one month.
+
+    Args:
+        period: Year/month string in format "YYYY/MM"
+
+    Returns:
+        GCS object name of the month's manifest
+    """
+    return f"{PLAYER_ENDPOINT_MANIFEST_PREFIX}/{period}"
+
+
+def list_existing_player_endpoints(bucket_name, year_month_list, logger):
+    """
+    List player endpoints already fetched for the selected months.
+
+    Each month is read from its compact manifest object. Months without a
+    manifest are bootstrapped once from a name-only listing scoped to that
+    month (listed in parallel) and the manifest is written for later runs.
+
+    Args:
+        bucket_name: GCS bucket name
+        year_month_list: List of year/month strings
+        logger: Cloud logging logger instance
+
+    Returns:
+        Sorted list of existing player endpoints for the selected months
+    """
+    existing_endpoints = set()
+    missing_periods = []
+    for period in year_month_list:
+        entries = read_gcs_manifest(bucket_name, player_endpoint_manifest_name(period), logger)
+        if entries is None:
+            missing_periods.append(period)
+        else:
+            existing_endpoints |= entries
+
+    if missing_periods:
+        log_printer(f"No endpoint manifest for {len(missing_periods)} month(s) - building from GCS listing", logger)
+        listings = list_files_in_gcs_globs(bucket_name, [f"player/*/games/{period}" for period in missing_periods], logger)
+        for period, match_glob in zip(missing_periods, listings):
+            update_gcs_manifest(bucket_name, player_endpoint_manifest_name(period), listings[match_glob], logger)
+            existing_endpoints |= set(listings[match_glob])
+
+    log_printer(f"Existing player endpoints for selected months: {len(existing_endpoints)}", logger)
+    return sorted(existing_endpoints)
+
+
+def record_player_endpoints_in_manifest(bucket_name, endpoints, logger):
+    """
+    Add newly fetched player endpoints to their monthly manifests.
+
+    Args:
+        bucket_name: GCS bucket name
+        endpoints: Iterable of endpoints in format "player/{user}/games/{YYYY}/{MM}"
+        logger: Cloud logging logger instance
+    """
+    endpoints_by_period = {}
+    for endpoint in endpoints:
+        period = "/".join(endpoint.split("/")[-2:])
+        endpoints_by_period.setdefault(period, []).append(endpoint)
+
+    for period, period_endpoints in endpoints_by_period.items():
+        update_gcs_manifest(bucket_name, player_endpoint_manifest_name(period), period_endpoints, logger)
+
+
+def _player_shard(player, shard_count):
+    """
+    Stable shard assignment of a player (CRC32 of the username, unlike the salted hash()).
+
+    Args:
+        player: Player username
+        shard_count: Total number of shards
+
+    Returns:
+        Shard index of the player
+    """
+    return zlib.crc32(player.encode("utf-8")) % shard_count
+
+
+def select_player_shard(top_player_list, shard_index, shard_count, logger=None):
+    """
+    Select the players belonging to one worker's shard.
+
+    Players are assigned by a stable CRC32 hash of their username, so every worker
+    derives the same partition regardless of leaderboard ordering or process.
+
+    Args:
+        top_player_list: List of player usernames
+        shard_index: Index of this worker's shard (0-based)
+        shard_count: Total number of shards
+        logger: Optional Cloud logging logger instance
+
+    Returns:
+        List of player usernames assigned to the shard
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard_index must be between 0 and {shard_count - 1}, got {shard_index}")
+
+    shard_players = [player for player in top_player_list if _player_shard(player, shard_count) == shard_index]
+    if logger:
+        log_printer(f"Shard {shard_index + 1}/{shard_count} | Players assigned: {len(shard_players)} of {len(top_player_list)}", logger)
+    return shard_players
+
+
+def generate_remaining_endpoint_combinations(bucket_name, players_data_in_gcs, top_player_list, year_month_list, logger, include_existing=False):
     """
     Generate list of API endpoints that haven't been fetched yet.
 
@@ -106,6 +401,8 @@ def generate_remaining_endpoint_combinations(bucket_name, players_data_in_gcs, t
         top_player_list: List of player usernames
         year_month_list: List of year/month strings
         logger: Cloud logging logger instance
+        include_existing: Keep combinations already in GCS so they can be re-fetched
+            with a conditional GET (refresh runs)
 
     Returns:
         List of remaining endpoint combinations to fetch
@@ -114,7 +411,11 @@ def generate_remaining_endpoint_combinations(bucket_name, players_data_in_gcs, t
     all_player_date_combinations = sorted([f"player/{player}/games/{period}" for player, period in product(top_player_list, year_month_list)])
 
     # If the combination does not exist in GCS --> add to remaining combination list so it can be requested
-    remaining_combinations = [combo for combo in all_player_date_combinations if combo not in players_data_in_gcs]
+    if include_existing:
+        remaining_combinations = all_player_date_combinations
+    else:
+        players_data_in_gcs = set(players_data_in_gcs)
+        remaining_combinations = [combo for combo in all_player_date_combinations if combo not in players_data_in_gcs]
 
     log_printer(f"Total request combinations: {len(all_player_date_combinations)}", logger)
     log_printer(f"Number of remaining requests: {len(remaining_combinations)}", logger)
@@ -133,15 +434,332 @@ def append_player_endpoints_to_https_chess_prefix(remaining_combo_list):
         List of full URLs
     """
     # Convert combos into URL request list
-    request_urls = [f"https://api.chess.com/pub/{endpoint}" for endpoint in remaining_combo_list]
+    request_urls = [f"{CHESS_API_BASE_URL}/{endpoint}" for endpoint in remaining_combo_list]
 
     return request_urls
 
 
-def exponential_backoff_request(url, headers, logger, max_retries=5, base_delay=3, max_delay=120):
+class AdaptiveRateLimiter:
+    """
+    Process-wide token bucket with AIMD rate control for Chess.com API calls.
+
+    Tokens refill at the current rate. Every successful response grows the rate
+    additively, every 429 cuts it multiplicatively, and a Retry-After header
+    pauses all callers until the server says it is safe to continue.
+
+    Args:
+        initial_rate: Starting rate in requests per second
+        min_rate: Lower bound for the rate after repeated 429s
+        max_rate: Upper bound for the rate after repeated successes
+        additive_increase: Requests/sec added on every successful response
+        multiplicative_decrease: Factor applied to the rate on every 429
+        burst: Maximum number of tokens that can accumulate
+        decrease_cooldown: Seconds after a decrease during which further 429s
+            (e.g. from requests already in flight) do not cut the rate again
+    """
+
+    def __init__(self, initial_rate=4.0, min_rate=0.5, max_rate=20.0,
+                 additive_increase=0.05, multiplicative_decrease=0.5, burst=4, decrease_cooldown=1.0):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.burst = burst
+        self.decrease_cooldown = decrease_cooldown
+        self.throttle_count = 0
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Block until a request token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._blocked_until:
+                    wait_time = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+    def record_success(self):
+        """Additive increase after a response that was not throttled."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.additive_increase)
+
+    def record_throttle(self, retry_after=None):
+        """
+        Multiplicative decrease after a 429, pausing all callers for Retry-After seconds.
+
+        Args:
+            retry_after: Seconds to pause every caller for, or None if not provided
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.throttle_count += 1
+            if now - self._last_decrease >= self.decrease_cooldown:
+                self.rate = max(self.min_rate, self.rate * self.multiplicative_decrease)
+                self._last_decrease = now
+            self._tokens = 0.0
+            if retry_after is not None:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    @property
+    def current_rate(self):
+        """Current allowed request rate in requests per second."""
+        return self.rate
+
+
+_CHESS_API_RATE_LIMITER = AdaptiveRateLimiter()
+
+
+def get_chess_api_rate_limiter():
+    """
+    Return the process-wide rate limiter shared by all Chess.com requests.
+
+    Returns:
+        AdaptiveRateLimiter instance
+    """
+    return _CHESS_API_RATE_LIMITER
+
+
+class RequestTimingStats:
+    """
+    Process-wide request and connection timing counters for Chess.com calls.
+
+    Request time is measured around every HTTP call. Handshake time is the time
+    spent opening new TCP+TLS connections, so the handshake share shows how much
+    latency connection reuse is (or isn't) saving. The most recent request
+    latencies are kept for percentiles, and retried attempts are counted.
+
+    Args:
+        latency_sample_size: Number of most recent request latencies kept for percentiles
+    """
+
+    def __init__(self, latency_sample_size=100_000):
+        self.requests = 0
+        self.request_seconds = 0.0
+        self.connections_opened = 0
+        self.handshake_seconds = 0.0
+        self.retries = 0
+        self._latencies = deque(maxlen=latency_sample_size)
+        self._lock = threading.Lock()
+
+    def record_request(self, seconds):
+        with self._lock:
+            self.requests += 1
+            self.request_seconds += seconds
+            self._latencies.append(seconds)
+
+    def record_handshake(self, seconds):
+        with self._lock:
+            self.connections_opened += 1
+            self.handshake_seconds += seconds
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def reset(self):
+        """Clear every counter (e.g. between benchmark runs)."""
+        with self._lock:
+            self.requests = 0
+            self.request_seconds = 0.0
+            self.connections_opened = 0
+            self.handshake_seconds = 0.0
+            self.retries = 0
+            self._latencies.clear()
+
+    def latency_percentile(self, percentile):
+        """
+        Request latency percentile over the recent sample.
+
+        Args:
+            percentile: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds (0.0 before any request)
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))]
+
+    def summary(self):
+        """Return a one-line summary of the collected timings."""
+        p50_ms = 1000 * self.latency_percentile(50)
+        p99_ms = 1000 * self.latency_percentile(99)
+        with self._lock:
+            avg_request_ms = 1000 * self.request_seconds / self.requests if self.requests else 0.0
+            handshake_share = 100 * self.handshake_seconds / self.request_seconds if self.request_seconds else 0.0
+            return (
+                f"Requests: {self.requests} | Avg request: {avg_request_ms:.1f} ms | p50: {p50_ms:.1f} ms | p99: {p99_ms:.1f} ms | "
+                f"Retries: {self.retries} | Connections opened: {self.connections_opened} | Handshake time: {self.handshake_seconds:.2f} s "
+                f"({handshake_share:.1f}% of request time)"
+            )
+
+
+_REQUEST_TIMING_STATS = RequestTimingStats()
+# HTTP/2 handshake start times per thread, keyed by thread ID
+_HTTPX_HANDSHAKE_STARTED = {}
+
+
+def get_request_timing_stats():
+    """
+    Return the process-wide request timing counters.
+
+    Returns:
+        RequestTimingStats instance
+    """
+    return _REQUEST_TIMING_STATS
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection that records TCP+TLS handshake time."""
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _REQUEST_TIMING_STATS.record_handshake(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """Pooled keep-alive adapter whose HTTPS connections record handshake time."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            **self.poolmanager.pool_classes_by_scheme,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def _record_httpx_handshake(event_name, info):
+    """httpcore trace callback that records TCP+TLS handshake time for HTTP/2 sessions."""
+    key = threading.get_ident()
+    if event_name == "connection.connect_tcp.started":
+        _HTTPX_HANDSHAKE_STARTED[key] = time.perf_counter()
+    elif event_name in ("connection.start_tls.complete", "connection.start_tls.failed") and key in _HTTPX_HANDSHAKE_STARTED:
+        _REQUEST_TIMING_STATS.record_handshake(time.perf_counter() - _HTTPX_HANDSHAKE_STARTED.pop(key))
+
+
+def create_chess_api_session(pool_maxsize=16, http2=False):
+    """
+    Create a pooled keep-alive HTTP session for Chess.com API calls.
+
+    Args:
+        pool_maxsize: Maximum number of keep-alive connections to api.chess.com
+            (should be at least the number of in-flight requests)
+        http2: Use an HTTP/2 multiplexed client (requires httpx[http2])
+
+    Returns:
+        requests.Session, or httpx.Client when http2 is enabled
+    """
+    if http2:
+        if httpx is None:
+            raise ImportError("HTTP/2 sessions require httpx: pip install 'httpx[http2]'")
+        return httpx.Client(
+            http2=True,
+            headers={"Accept-Encoding": _ACCEPT_ENCODING},
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+        )
+
+    session = requests.Session()
+    adapter = _TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": _ACCEPT_ENCODING})
+    return session
+
+
+_CHESS_API_SESSION = None
+_CHESS_API_SESSION_LOCK = threading.Lock()
+
+
+def get_chess_api_session():
+    """
+    Return the process-wide Chess.com session, creating it on first use.
+
+    Returns:
+        requests.Session instance
+    """
+    global _CHESS_API_SESSION
+    with _CHESS_API_SESSION_LOCK:
+        if _CHESS_API_SESSION is None:
+            _CHESS_API_SESSION = create_chess_api_session()
+        return _CHESS_API_SESSION
+
+
+def _timed_get(session, url, headers):
+    """
+    Issue a GET through the session and record its duration.
+
+    Args:
+        session: requests.Session or httpx.Client
+        url: URL to request
+        headers: Request headers
+
+    Returns:
+        Response object
+    """
+    start = time.perf_counter()
+    if httpx is not None and isinstance(session, httpx.Client):
+        response = session.get(url, headers=headers, extensions={"trace": _record_httpx_handshake})
+    else:
+        response = session.get(url, headers=headers)
+    _REQUEST_TIMING_STATS.record_request(time.perf_counter() - start)
+    return response
+
+
+def _parse_retry_after(response):
+    """
+    Parse the Retry-After header of a response into seconds.
+
+    Args:
+        response: Response object
+
+    Returns:
+        Seconds to wait as float, or None if the header is missing or invalid
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is None:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def exponential_backoff_request(url, headers, logger, max_retries=5, base_delay=3, max_delay=120, rate_limiter=None, session=None):
     """
     Make HTTP request with exponential backoff retry logic.
 
+    Every attempt first takes a token from the shared rate limiter. A 429 reduces
+    the shared rate (and honours Retry-After) instead of backing off per URL;
+    other non-200/404 codes keep the per-URL exponential backoff.
+
     Args:
         url: URL to request
         headers: Request headers
@@ -149,33 +767,636 @@ def exponential_backoff_request(url, headers, logger, max_retries=5, base_delay=
         max_retries: Maximum number of retry attempts
         base_delay: Base delay in seconds
         max_delay: Maximum delay in seconds
+        rate_limiter: Optional AdaptiveRateLimiter (default: process-wide limiter)
+        session: Optional pooled session from create_chess_api_session (default: process-wide session)
 
     Returns:
-        Response object or None if failed
+        Response object (200, or 304 for conditional requests) or None if failed
     """
+    if rate_limiter is None:
+        rate_limiter = get_chess_api_rate_limiter()
+    if session is None:
+        session = get_chess_api_session()
+
     retries = 0
     while retries < max_retries:
-        response = requests.get(url, headers=headers)
+        rate_limiter.acquire()
+        response = _timed_get(session, url, headers)
         status_code = response.status_code
 
-        if status_code == 200:
+        if status_code in (200, 304):
+            rate_limiter.record_success()
             return response
 
         if status_code == 404:
+            rate_limiter.record_success()
             log_printer(f"404 error for {url} - Endpoint currently not working...Skipping", logger, severity="WARNING")
             return None
 
+        # Rate limited - slow down every caller sharing the limiter rather than just this URL
+        if status_code == 429:
+            retry_after = _parse_retry_after(response)
+            rate_limiter.record_throttle(retry_after)
+            log_printer(f"HTTP Status Code: 429 | Retry {retries + 1}/{max_retries} - Rate reduced to {rate_limiter.current_rate:.2f} req/s | Retry-After: {retry_after} | URL: {url}", logger, severity="WARNING")
+            _REQUEST_TIMING_STATS.record_retry()
+            retries += 1
+            continue
+
         # Will attempt a retry process for non-404 codes with expontential backoff
         wait_time = min(base_delay * (4 ** retries) + random.uniform(0, 1), max_delay)
         log_printer(f"HTTP Status Code: {status_code} | Retry {retries + 1}/{max_retries} - Sleeping {wait_time:.2f} seconds | URL: {url}", logger, severity="WARNING")
         time.sleep(wait_time)
+        _REQUEST_TIMING_STATS.record_retry()
         retries += 1
 
-    log_printer("Max retries reached. Request failed for {url}", logger, severity="ERROR")
+    log_printer(f"Max retries reached. Request failed for {url}", logger, severity="ERROR")
     return None
 
 
-def request_from_list_and_upload_to_gcs(bucket_name, request_urls, headers, logger):
+def _response_validators(response):
+    """
+    Extract HTTP cache validators from a response as GCS object metadata.
+
+    Args:
+        response: Response object
+
+    Returns:
+        Dictionary of validator metadata (empty if the response carries none)
+    """
+    validators = {
+        "chess_api_etag": response.headers.get("ETag"),
+        "chess_api_last_modified": response.headers.get("Last-Modified"),
+    }
+    return {key: value for key, value in validators.items() if value is not None}
+
+
+def _conditional_request_headers(object_metadata):
+    """
+    Build conditional GET headers from validators stored on a GCS object.
+
+    Args:
+        object_metadata: GCS object metadata dictionary, or None if the object does not exist
+
+    Returns:
+        Dictionary of If-None-Match/If-Modified-Since headers
+    """
+    if not object_metadata:
+        return {}
+
+    conditional_headers = {}
+    if "chess_api_etag" in object_metadata:
+        conditional_headers["If-None-Match"] = object_metadata["chess_api_etag"]
+    if "chess_api_last_modified" in object_metadata:
+        conditional_headers["If-Modified-Since"] = object_metadata["chess_api_last_modified"]
+    return conditional_headers
+
+
+_END_TIME_PATTERN = re.compile(rb'"end_time"\s*:\s*(\d+)')
+
+
+def _max_end_time(payload: bytes):
+    """
+    Find the latest game end_time in a raw archive without parsing the JSON.
+
+    Args:
+        payload: Raw (uncompressed) archive bytes
+
+    Returns:
+        Highest end_time as an integer, or 0 if the archive holds no games
+    """
+    return max((int(end_time) for end_time in _END_TIME_PATTERN.findall(payload)), default=0)
+
+
+def _archive_endpoint_from_url(url):
+    """
+    Build the GCS object name of a player archive from its API URL.
+
+    Args:
+        url: Player games archive URL
+
+    Returns:
+        GCS object name in the form player/{username}/games/{YYYY}/{MM}
+    """
+    match = re.search(r'player/([^/]+)/games/(\d{4}/\d{2})', url)
+    if match:
+        player = match.group(1)
+        period = match.group(2)
+    return f"player/{player}/games/{period}"
+
+
+def _fetch_and_upload_archive(bucket_name, url, headers, logger, conditional=False, session=None,
+                              compression=None, zstd_dict=None):
+    """
+    Request a single archive URL and upload the response to GCS.
+
+    Args:
+        bucket_name: GCS bucket name
+        url: URL to request
+        headers: Request headers
+        logger: Cloud logging logger instance
+        conditional: Send the validators stored on the existing GCS object so
+            an unchanged archive returns 304 and is neither downloaded nor uploaded
+        session: Optional pooled session shared across requests
+        compression: Optional storage codec for the uploaded object ("gzip" or "zstd")
+        zstd_dict: Optional trained zstd dictionary for "zstd"
+
+    Returns:
+        "uploaded", "not_modified" or "skipped"
+    """
+    gcs_player_endpoint = _archive_endpoint_from_url(url)
+
+    # Generation 0 = only create the object; a refresh may only replace the version it revalidated.
+    # Either way an upload never clobbers an object another worker wrote in the meantime.
+    generation = 0
+    if conditional:
+        generation, object_metadata = stat_gcs_object(bucket_name, gcs_player_endpoint)
+        headers = {**headers, **_conditional_request_headers(object_metadata)}
+
+    # Requesting Data
+    games_response = exponential_backoff_request(url, headers, logger, session=session)
+
+    if games_response is None:
+        return "skipped"
+
+    if games_response.status_code == 304:
+        log_printer(f"Not modified | Skipping re-upload of {gcs_player_endpoint}", logger)
+        return "not_modified"
+
+    # Saving Data to GCS alongside the validators for the next refresh
+    try:
+        upload_json_to_gcs_bucket(
+            bucket_name,
+            gcs_player_endpoint,
+            games_response,
+            logger,
+            metadata={**_response_validators(games_response), "chess_api_max_end_time": str(_max_end_time(games_response.content))},
+            raw=True,
+            validate=True,
+            compression=compression,
+            zstd_dict=zstd_dict,
+            if_generation_match=generation,
+        )
+    except PreconditionFailed:
+        log_printer(f"{gcs_player_endpoint} was written by another worker - leaving it in place", logger, severity="WARNING")
+        return "not_modified"
+    except ValueError as e:
+        log_printer(f"{e} | URL: {url}", logger, severity="ERROR")
+        return "skipped"
+    return "uploaded"
+
+
+def _refresh_archive_increment(bucket_name, url, headers, logger, session=None, compression=None, zstd_dict=None):
+    """
+    Re-request an archive already in GCS and store only the games newer than what is held.
+
+    The highest end_time already stored is kept in the archive's metadata (computed from
+    the object once for archives uploaded before it was tracked). Newer games are written
+    as an append segment under {endpoint}/increments/{max_end_time}, leaving the original
+    object and every earlier segment untouched. Archives not yet in GCS are fetched in full.
+
+    Args:
+        bucket_name: GCS bucket name
+        url: URL to request
+        headers: Request headers
+        logger: Cloud logging logger instance
+        session: Optional pooled session shared across requests
+        compression: Optional storage codec for the uploaded segment ("gzip" or "zstd")
+        zstd_dict: Optional trained zstd dictionary for "zstd"
+
+    Returns:
+        "uploaded", "not_modified" or "skipped"
+    """
+    gcs_player_endpoint = _archive_endpoint_from_url(url)
+    _, metageneration, object_metadata = stat_gcs_object(bucket_name, gcs_player_endpoint, include_metageneration=True)
+    if object_metadata is None:
+        return _fetch_and_upload_archive(bucket_name, url, headers, logger, session=session, compression=compression, zstd_dict=zstd_dict)
+
+    if "chess_api_max_end_time" in object_metadata:
+        stored_max_end_time = int(object_metadata["chess_api_max_end_time"])
+    else:
+        stored_max_end_time = _max_end_time(download_content_from_gcs(gcs_player_endpoint, bucket_name).encode("utf-8"))
+
+    # Requesting Data - a 304 means nothing was played since the last refresh
+    games_response = exponential_backoff_request(url, {**headers, **_conditional_request_headers(object_metadata)}, logger, session=session)
+
+    if games_response is None:
+        return "skipped"
+
+    if games_response.status_code == 304:
+        log_printer(f"Not modified | No new games for {gcs_player_endpoint}", logger)
+        return "not_modified"
+
+    new_games = [game for game in games_response.json().get("games", []) if game.get("end_time", 0) > stored_max_end_time]
+    refreshed_metadata = _response_validators(games_response)
+
+    if new_games:
+        latest_end_time = max(game["end_time"] for game in new_games)
+        segment_name = f"{gcs_player_endpoint}/{ARCHIVE_INCREMENT_DIRECTORY}/{latest_end_time}"
+        segment = SimpleNamespace(content=json.dumps({"games": new_games}).encode("utf-8"))
+        try:
+            upload_json_to_gcs_bucket(bucket_name, segment_name, segment, logger, raw=True, compression=compression, zstd_dict=zstd_dict, if_generation_match=0)
+            log_printer(f"Appended {len(new_games)} new games to {gcs_player_endpoint} (end_time > {stored_max_end_time})", logger)
+        except PreconditionFailed:
+            # Same games, same segment name: an earlier run stored the segment but died before
+            # recording the high-water mark below, so keep the segment and finish that update
+            log_printer(f"{segment_name} already exists from an interrupted refresh - recording its high-water mark", logger, severity="WARNING")
+        refreshed_metadata["chess_api_max_end_time"] = str(latest_end_time)
+
+    # Keep validators and the high-water mark on the original object for the next refresh
+    try:
+        update_gcs_object_metadata(bucket_name, gcs_player_endpoint, {**object_metadata, **refreshed_metadata}, if_metageneration_match=metageneration)
+    except PreconditionFailed:
+        log_printer(f"Metadata of {gcs_player_endpoint} changed during the refresh - leaving it for the next run", logger, severity="WARNING")
+        return "skipped"
+    return "uploaded" if new_games else "not_modified"
+
+
+async def _async_fetch_and_upload_archives(request_urls, fetch_archive, max_in_flight):
+    """
+    Fetch and upload archives with a bounded number of requests in flight.
+
+    A fixed pool of worker coroutines pulls URLs from a queue and hands the blocking
+    request/upload work to a thread pool of the same size, so each archive is uploaded
+    as soon as it arrives and memory stays flat regardless of the URL count.
+
+    Args:
+        request_urls: List of URLs to request
+        fetch_archive: Blocking callable taking a URL and returning its outcome
+        max_in_flight: Maximum number of concurrent requests
+
+    Returns:
+        List of (url, outcome) tuples, outcome being "uploaded", "not_modified" or "skipped"
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    for url in request_urls:
+        queue.put_nowait(url)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+
+        async def worker():
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                outcome = await loop.run_in_executor(executor, fetch_archive, url)
+                results.append((url, outcome))
+
+        await asyncio.gather(*(worker() for _ in range(max_in_flight)))
+
+    return results
+
+
+def _run_coroutine(coro):
+    """
+    Run a coroutine to completion from synchronous code.
+
+    Falls back to a dedicated thread when an event loop is already running
+    in the calling thread (e.g. inside a marimo notebook).
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        Result of the coroutine
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+_PLAYER_ARCHIVE_PERIODS_CACHE = {}
+
+
+def fetch_player_archive_periods(bucket_name, player, year_month_list, headers, logger, session=None):
+    """
+    Return the months a player has game archives for, using a GCS-backed cache.
+
+    The /games/archives response is cached under player_archives/{player} together
+    with the month it was fetched in. A cached list fetched after every requested
+    month is reused as-is (past months cannot gain an archive later); otherwise it is
+    re-validated with a conditional GET and only re-downloaded if it changed.
+
+    Args:
+        bucket_name: GCS bucket name
+        player: Player username
+        year_month_list: List of year/month strings being planned
+        headers: Request headers
+        logger: Cloud logging logger instance
+        session: Optional pooled session shared across requests
+
+    Returns:
+        Set of "YYYY/MM" periods, or None if the archive list could not be retrieved
+    """
+    if player in _PLAYER_ARCHIVE_PERIODS_CACHE:
+        return _PLAYER_ARCHIVE_PERIODS_CACHE[player]
+
+    cache_object = f"{PLAYER_ARCHIVES_CACHE_PREFIX}/{player}"
+    current_period = date.today().strftime("%Y/%m")
+    object_metadata = get_gcs_object_metadata(bucket_name, cache_object)
+
+    if object_metadata and object_metadata.get("fetched_period", "") > max(year_month_list):
+        archives_content = download_content_from_gcs(cache_object, bucket_name)
+    else:
+        archives_url = f"{CHESS_API_BASE_URL}/player/{player}/games/archives"
+        request_headers = {**headers, **_conditional_request_headers(object_metadata)}
+        archives_response = exponential_backoff_request(archives_url, request_headers, logger, session=session)
+
+        if archives_response is None:
+            return None
+
+        if archives_response.status_code == 304:
+            archives_content = download_content_from_gcs(cache_object, bucket_name)
+        else:
+            archives_content = archives_response.content
+            upload_json_to_gcs_bucket(
+                bucket_name,
+                cache_object,
+                archives_response,
+                metadata={**_response_validators(archives_response), "fetched_period": current_period},
+                raw=True,
+            )
+
+    archive_periods = {"/".join(url.split("/")[-2:]) for url in json.loads(archives_content).get("archives", [])}
+    _PLAYER_ARCHIVE_PERIODS_CACHE[player] = archive_periods
+    return archive_periods
+
+
+def filter_combinations_by_player_archives(bucket_name, remaining_combo_list, year_month_list, headers, logger,
+                                           max_in_flight=8, session=None):
+    """
+    Drop player/month combinations the player has no game archive for.
+
+    Each player's /games/archives list is fetched once (see fetch_player_archive_periods)
+    and intersected with the planned months. Players whose archive list cannot be
+    retrieved keep all of their combinations.
+
+    Args:
+        bucket_name: GCS bucket name
+        remaining_combo_list: List of endpoint paths "player/{user}/games/{YYYY}/{MM}"
+        year_month_list: List of year/month strings being planned
+        headers: Request headers
+        logger: Cloud logging logger instance
+        max_in_flight: Maximum number of concurrent archive list requests
+        session: Optional pooled session shared across requests
+
+    Returns:
+        List of endpoint paths with an existing archive
+    """
+    players = sorted({combo.split("/")[1] for combo in remaining_combo_list})
+    log_printer(f"Planning | Fetching archive lists for {len(players)} players", logger)
+
+    if len(players) == 0:
+        return []
+
+    def archive_periods(player):
+        return fetch_player_archive_periods(bucket_name, player, year_month_list, headers, logger, session)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(players)))) as executor:
+        periods_by_player = dict(zip(players, executor.map(archive_periods, players)))
+
+    planned_combinations = []
+    for combo in remaining_combo_list:
+        _, player, _, year, month = combo.split("/")
+        player_periods = periods_by_player[player]
+        if player_periods is None or f"{year}/{month}" in player_periods:
+            planned_combinations.append(combo)
+
+    log_printer(f"Planning | Planned requests: {len(planned_combinations)} | Skipped months without an archive: {len(remaining_combo_list) - len(planned_combinations)}", logger)
+    return planned_combinations
+
+
+class IngestionJournal:
+    """
+    Append-only progress journal for an ingestion run, checkpointed to GCS.
+
+    Every endpoint moves through planned -> in_flight -> done/failed. Records are
+    buffered in memory and appended to the journal object at most every
+    checkpoint_interval seconds, so a restarted run can pick up the endpoints
+    that were still planned or in flight without listing the bucket or re-planning.
+
+    Args:
+        bucket_name: GCS bucket name
+        journal_name: Name of the journal object in GCS
+        logger: Cloud logging logger instance
+        checkpoint_interval: Minimum seconds between checkpoints to GCS
+    """
+
+    TERMINAL_STATES = ("done", "failed")
+
+    def __init__(self, bucket_name, journal_name, logger, checkpoint_interval=30):
+        self.bucket_name = bucket_name
+        self.journal_name = journal_name
+        self.logger = logger
+        self.checkpoint_interval = checkpoint_interval
+        self._buffer = []
+        self._last_checkpoint = time.monotonic()
+        self._lock = threading.Lock()
+
+    def load_pending(self):
+        """
+        Read the journal from GCS and return endpoints left unfinished by a previous run.
+
+        Returns:
+            Sorted list of planned or in-flight endpoints, or None if there is no
+            unfinished journal and the run should be planned from scratch
+        """
+        try:
+            content = download_content_from_gcs(self.journal_name, self.bucket_name)
+        except NotFound:
+            return None
+
+        latest_state = {}
+        for line in content.splitlines():
+            record = json.loads(line)
+            if record["state"] == "run_completed":
+                latest_state = {}
+                continue
+            latest_state[record["endpoint"]] = record["state"]
+
+        if not latest_state:
+            return None
+
+        pending = sorted(endpoint for endpoint, state in latest_state.items() if state not in self.TERMINAL_STATES)
+        log_printer(f"Resuming from journal {self.journal_name} | Pending endpoints: {len(pending)} | Finished endpoints: {len(latest_state) - len(pending)}", self.logger)
+        return pending
+
+    def record(self, endpoint, state):
+        """Record a state change for an endpoint, checkpointing if the interval has elapsed."""
+        with self._lock:
+            self._buffer.append({"endpoint": endpoint, "state": state, "ts": datetime.now(timezone.utc).isoformat()})
+            due = time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+        if due:
+            self.checkpoint()
+
+    def record_planned(self, endpoints):
+        """Record the full plan and checkpoint it immediately."""
+        with self._lock:
+            timestamp = datetime.now(timezone.utc).isoformat()
+            self._buffer.extend({"endpoint": endpoint, "state": "planned", "ts": timestamp} for endpoint in endpoints)
+        self.checkpoint()
+
+    def checkpoint(self):
+        """Append buffered records to the journal object in GCS."""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            self._last_checkpoint = time.monotonic()
+            if records:
+                payload = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+                append_to_gcs_object(self.bucket_name, self.journal_name, payload)
+        if records:
+            log_printer(f"Journal checkpoint | {len(records)} records appended to {self.journal_name}", self.logger)
+
+    def complete(self):
+        """Mark the run as completed so the next run plans from scratch."""
+        with self._lock:
+            self._buffer.append({"endpoint": None, "state": "run_completed", "ts": datetime.now(timezone.utc).isoformat()})
+        self.checkpoint()
+
+
+class PlayerPeriodBitmaps:
+    """
+    Compact record of processed player/period combinations for dlt source state.
+
+    Players are numbered in first-seen order and every period keeps a bitmap over
+    those indices, so each month costs one bit per player instead of a
+    "player|period" string. Bitmaps are base64-encoded in the state to keep it
+    JSON-serialisable. Safe to update from parallel (deferred) work items.
+
+    Args:
+        players: Usernames in index order, from a previous state
+        periods: Dictionary of "YYYY/MM" -> base64 bitmap, from a previous state
+    """
+
+    def __init__(self, players=None, periods=None):
+        self.players = list(players or [])
+        self._index = {player: i for i, player in enumerate(self.players)}
+        self._bitmaps = {period: bytearray(base64.b64decode(bits)) for period, bits in (periods or {}).items()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_state(cls, state):
+        """Load from a dictionary written by to_state (empty if state is None)."""
+        state = state or {}
+        return cls(state.get("players"), state.get("periods"))
+
+    def to_state(self):
+        """Serialise to a JSON-compatible dictionary."""
+        with self._lock:
+            return {
+                "players": list(self.players),
+                "periods": {period: base64.b64encode(bytes(bits)).decode("ascii") for period, bits in sorted(self._bitmaps.items())},
+            }
+
+    def _player_index(self, player):
+        if player not in self._index:
+            self._index[player] = len(self.players)
+            self.players.append(player)
+        return self._index[player]
+
+    def is_processed(self, player, period):
+        with self._lock:
+            if player not in self._index or period not in self._bitmaps:
+                return False
+            index = self._index[player]
+            bits = self._bitmaps[period]
+            return index >> 3 < len(bits) and bool(bits[index >> 3] & (1 << (index & 7)))
+
+    def mark_processed(self, player, period):
+        with self._lock:
+            index = self._player_index(player)
+            bits = self._bitmaps.setdefault(period, bytearray())
+            if index >> 3 >= len(bits):
+                bits.extend(bytes((index >> 3) + 1 - len(bits)))
+            bits[index >> 3] |= 1 << (index & 7)
+
+    def prune_periods(self, oldest_period):
+        """
+        Drop bitmaps of periods before oldest_period so the state does not grow with every month.
+
+        Players left without a processed period (e.g. who dropped off the leaderboards) are
+        removed from the index too, and the kept bitmaps are renumbered to match.
+
+        Args:
+            oldest_period: Earliest "YYYY/MM" period to keep
+
+        Returns:
+            Number of periods dropped
+        """
+        with self._lock:
+            expired = [period for period in self._bitmaps if period < oldest_period]
+            for period in expired:
+                del self._bitmaps[period]
+
+            # Bit i of each bitmap is bit i of its little-endian integer
+            period_bits = {period: int.from_bytes(bits, "little") for period, bits in self._bitmaps.items()}
+            any_processed = 0
+            for bits in period_bits.values():
+                any_processed |= bits
+            kept_indices = [index for index in range(len(self.players)) if any_processed >> index & 1]
+
+            if len(kept_indices) < len(self.players):
+                self.players = [self.players[index] for index in kept_indices]
+                self._index = {player: i for i, player in enumerate(self.players)}
+                for period, bits in period_bits.items():
+                    renumbered = 0
+                    for new_index, old_index in enumerate(kept_indices):
+                        if bits >> old_index & 1:
+                            renumbered |= 1 << new_index
+                    self._bitmaps[period] = bytearray(renumbered.to_bytes((len(self.players) + 7) >> 3, "little"))
+            return len(expired)
+
+
+def ingestion_journal_name(start_date, end_date, shard_index=0, shard_count=1):
+    """
+    Name of the journal object for an ingestion run over a date range.
+
+    Args:
+        start_date: Start date of the run
+        end_date: End date of the run
+        shard_index: Index of this worker's shard (0-based)
+        shard_count: Total number of shards
+
+    Returns:
+        GCS object name of the journal
+    """
+    shard_suffix = f"_shard-{shard_index}-of-{shard_count}" if shard_count > 1 else ""
+    return f"{INGESTION_JOURNAL_PREFIX}/{start_date:%Y-%m-%d}_{end_date:%Y-%m-%d}{shard_suffix}.ndjson"
+
+
+def _journaled_fetch(fetch_archive, journal):
+    """
+    Wrap an archive fetch so its progress is recorded in the journal.
+
+    Args:
+        fetch_archive: Blocking callable taking a URL and returning its outcome
+        journal: IngestionJournal instance
+
+    Returns:
+        Callable with the same signature as fetch_archive
+    """
+    def fetch(url):
+        endpoint = url.split("/pub/", 1)[1]
+        journal.record(endpoint, "in_flight")
+        try:
+            outcome = fetch_archive(url)
+        except Exception:
+            journal.record(endpoint, "failed")
+            raise
+        journal.record(endpoint, "failed" if outcome == "skipped" else "done")
+        return outcome
+
+    return fetch
+
+
+def request_from_list_and_upload_to_gcs(bucket_name, request_urls, headers, logger, max_in_flight=8, conditional=False, session=None,
+                                        compression=None, zstd_dict=None, update_manifest=True, journal=None, incremental=False):
     """
     Request data from list of URLs and upload to GCS.
 
@@ -184,22 +1405,361 @@ def request_from_list_and_upload_to_gcs(bucket_name, request_urls, headers, logg
         request_urls: List of URLs to request
         headers: Request headers
         logger: Cloud logging logger instance
+        max_in_flight: Maximum number of concurrent requests (1 runs serially)
+        conditional: Re-fetch existing objects with If-None-Match/If-Modified-Since
+            and skip the upload when the archive is unchanged (304)
+        session: Optional pooled session from create_chess_api_session, shared with
+            the leaderboard request (default: process-wide session)
+        compression: Optional storage codec for uploaded archives ("gzip" or "zstd")
+        zstd_dict: Optional trained zstd dictionary for "zstd"
+        update_manifest: Record uploaded endpoints in the monthly endpoint manifests
+        journal: Optional IngestionJournal recording per-endpoint progress
+        incremental: Re-request archives already in GCS and store only games newer than
+            the highest stored end_time as append segments (implies conditional requests)
     """
-    log_printer(f'Requesting archived game data', logger)
-    for url in request_urls:
+    log_printer(f'Requesting archived game data | Max in-flight requests: {max_in_flight}', logger)
+    if len(request_urls) == 0:
+        return
+
+    max_in_flight = max(1, min(max_in_flight, len(request_urls)))
+    start = time.perf_counter()
+    if incremental:
+        fetch_archive = partial(
+            _refresh_archive_increment,
+            bucket_name,
+            headers=headers,
+            logger=logger,
+            session=session,
+            compression=compression,
+            zstd_dict=zstd_dict,
+        )
+    else:
+        fetch_archive = partial(
+            _fetch_and_upload_archive,
+            bucket_name,
+            headers=headers,
+            logger=logger,
+            conditional=conditional,
+            session=session,
+            compression=compression,
+            zstd_dict=zstd_dict,
+        )
+    if journal is not None:
+        fetch_archive = _journaled_fetch(fetch_archive, journal)
 
-        # Requesting Data
-        games_response = exponential_backoff_request(url, headers, logger)
+    try:
+        results = _run_coroutine(_async_fetch_and_upload_archives(request_urls, fetch_archive, max_in_flight))
+    finally:
+        if journal is not None:
+            journal.checkpoint()
+    elapsed = time.perf_counter() - start
 
-        if games_response == None:
-            continue
+    outcomes = Counter(outcome for _, outcome in results)
+    rate_limiter = get_chess_api_rate_limiter()
+    log_printer(f"Completed {len(results)} requests in {elapsed:.2f} seconds | Uploaded: {outcomes['uploaded']} | Not Modified: {outcomes['not_modified']} | Skipped/Failed: {outcomes['skipped']} | Throughput: {len(results) / elapsed:.2f} requests/sec", logger)
+    log_printer(f"Rate limiter | Current rate: {rate_limiter.current_rate:.2f} requests/sec | 429 responses: {rate_limiter.throttle_count}", logger)
+    log_printer(f"Request timing | {get_request_timing_stats().summary()}", logger)
+
+    byte_counts = get_gcs_upload_byte_counts()
+    log_printer(f"GCS uploads | Objects: {byte_counts['objects']} | Bytes in: {byte_counts['bytes_in']} | Bytes out: {byte_counts['bytes_out']}", logger)
+
+    if update_manifest:
+        uploaded_endpoints = [url.split("/pub/", 1)[1] for url, outcome in results if outcome == "uploaded"]
+        record_player_endpoints_in_manifest(bucket_name, uploaded_endpoints, logger)
+
+
+def _bigquery_safe_keys(record):
+    """
+    Rewrite JSON keys into valid BigQuery column names (e.g. "@id" -> "_id"), recursively.
+
+    Args:
+        record: Parsed JSON value
+
+    Returns:
+        The same value with every dictionary key restricted to letters, digits and underscores
+    """
+    if isinstance(record, dict):
+        return {re.sub(r"\W", "_", key): _bigquery_safe_keys(value) for key, value in record.items()}
+    if isinstance(record, list):
+        return [_bigquery_safe_keys(value) for value in record]
+    return record
+
+
+def _fetch_player_profile_and_stats(player, headers, logger, session=None):
+    """
+    Request a player's profile and stats endpoints.
+
+    Args:
+        player: Player username
+        headers: Request headers
+        logger: Cloud logging logger instance
+        session: Optional pooled session shared across requests
+
+    Returns:
+        Tuple of (profile, stats) dictionaries, either None if its request failed
+    """
+    profile_response = exponential_backoff_request(f"{CHESS_API_BASE_URL}/player/{player}", headers, logger, session=session)
+    stats_response = exponential_backoff_request(f"{CHESS_API_BASE_URL}/player/{player}/stats", headers, logger, session=session)
+    return (
+        None if profile_response is None else profile_response.json(),
+        None if stats_response is None else stats_response.json(),
+    )
+
+
+def request_player_profiles_and_upload_to_gcs(bucket_name, player_list, snapshot_name, headers, logger, max_in_flight=8,
+                                              session=None, request_budget=None):
+    """
+    Fetch profile and stats for a set of players and store them as per-snapshot NDJSON.
+
+    Players are deduplicated case-insensitively so each endpoint is requested at most once
+    per run. Requests go through exponential_backoff_request and therefore share the
+    process-wide rate limiter with the archive requests. One row per player is written to
+    player_profiles/{snapshot_name}.ndjson and player_stats/{snapshot_name}.ndjson, with
+    keys made BigQuery-safe so each file can be loaded directly as NEWLINE_DELIMITED_JSON.
+
+    Args:
+        bucket_name: GCS bucket name
+        player_list: List of player usernames
+        snapshot_name: Snapshot identifier used in the object names (e.g. "2025-08-01/06-00-00")
+        headers: Request headers
+        logger: Cloud logging logger instance
+        max_in_flight: Maximum number of players requested concurrently
+        session: Optional pooled session shared across requests
+        request_budget: Optional maximum number of API requests (two per player)
+
+    Returns:
+        Tuple of (profile_object_name, stats_object_name)
+    """
+    players = sorted({player.lower() for player in player_list})
+    if request_budget is not None and len(players) * 2 > request_budget:
+        log_printer(f"Request budget of {request_budget} covers {request_budget // 2} of {len(players)} players - truncating", logger, severity="WARNING")
+        players = players[:request_budget // 2]
+
+    log_printer(f"Requesting profiles and stats for {len(players)} players | Max in-flight requests: {max_in_flight}", logger)
+    profile_object_name = f"{PLAYER_PROFILES_PREFIX}/{snapshot_name}.ndjson"
+    stats_object_name = f"{PLAYER_STATS_PREFIX}/{snapshot_name}.ndjson"
+    if len(players) == 0:
+        return profile_object_name, stats_object_name
+
+    snapshot_dt = datetime.now(timezone.utc).isoformat()
+    fetch_player = partial(_fetch_player_profile_and_stats, headers=headers, logger=logger, session=session)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(players)))) as executor:
+        results = list(zip(players, executor.map(fetch_player, players)))
+    elapsed = time.perf_counter() - start
+
+    profile_rows = []
+    stats_rows = []
+    for player, (profile, stats) in results:
+        if profile is not None:
+            profile_rows.append(json.dumps({**_bigquery_safe_keys(profile), "username": player, "snapshot_dt": snapshot_dt}))
+        if stats is not None:
+            stats_rows.append(json.dumps({**_bigquery_safe_keys(stats), "username": player, "snapshot_dt": snapshot_dt}))
+
+    log_printer(f"Completed {len(players) * 2} requests in {elapsed:.2f} seconds | Profiles: {len(profile_rows)} | Stats: {len(stats_rows)} | Throughput: {len(players) * 2 / elapsed:.2f} requests/sec", logger)
+
+    for object_name, rows in ((profile_object_name, profile_rows), (stats_object_name, stats_rows)):
+        if rows:
+            append_to_gcs_object(bucket_name, object_name, ("\n".join(rows) + "\n").encode("utf-8"), logger)
+
+    return profile_object_name, stats_object_name
+
+
+class PlayerBloomFilter:
+    """
+    Fixed-size Bloom filter of usernames for crawl deduplication.
+
+    Memory is set up front from the expected capacity and false positive rate
+    (about 1.2 MB for a million players at 1%) and does not grow as players are
+    added. A false positive only means a player is skipped, never fetched twice.
+
+    Args:
+        capacity: Expected number of distinct players
+        error_rate: Target false positive rate at capacity
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.bit_count = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, player):
+        digest = hashlib.blake2b(player.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bit_count for i in range(self.hash_count)]
+
+    def add(self, player):
+        """Add a player, returning True if it was not already (probably) present."""
+        added = False
+        for position in self._positions(player):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                self.bits[position >> 3] |= 1 << (position & 7)
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, player):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(player))
+
+
+_OPPONENT_USERNAME_PATTERN = re.compile(rb'"username"\s*:\s*"([^"\\]+)"')
+
+
+def _fetch_archive_opponents(bucket_name, endpoint, existing_endpoints, headers, logger, session=None, compression=None, zstd_dict=None):
+    """
+    Read one player archive - from GCS when already stored, otherwise from the API - and list its players.
+
+    Archives requested from the API are uploaded as in request_from_list_and_upload_to_gcs.
+
+    Args:
+        bucket_name: GCS bucket name
+        endpoint: Endpoint in format "player/{user}/games/{YYYY}/{MM}"
+        existing_endpoints: Set of endpoints already stored in GCS
+        headers: Request headers
+        logger: Cloud logging logger instance
+        session: Optional pooled session shared across requests
+        compression: Optional storage codec for uploaded archives ("gzip" or "zstd")
+        zstd_dict: Optional trained zstd dictionary for "zstd"
+
+    Returns:
+        Tuple of (requested, uploaded, usernames): whether the API was called, whether
+        a new archive was stored, and the set of lowercase white/black usernames found
+    """
+    if endpoint in existing_endpoints:
+        return False, False, {username.decode("utf-8").lower() for username in _OPPONENT_USERNAME_PATTERN.findall(download_content_from_gcs(endpoint, bucket_name).encode("utf-8"))}
+
+    games_response = exponential_backoff_request(f"{CHESS_API_BASE_URL}/{endpoint}", headers, logger, session=session)
+    if games_response is None:
+        return True, False, set()
+
+    uploaded = True
+    try:
+        upload_json_to_gcs_bucket(
+            bucket_name,
+            endpoint,
+            games_response,
+            logger,
+            metadata={**_response_validators(games_response), "chess_api_max_end_time": str(_max_end_time(games_response.content))},
+            raw=True,
+            validate=True,
+            compression=compression,
+            zstd_dict=zstd_dict,
+            if_generation_match=0,
+        )
+    except (PreconditionFailed, ValueError) as e:
+        log_printer(f"Not storing crawled archive {endpoint}: {e}", logger, severity="WARNING")
+        uploaded = False
+    return True, uploaded, {username.decode("utf-8").lower() for username in _OPPONENT_USERNAME_PATTERN.findall(games_response.content)}
+
+
+def crawl_opponent_graph(bucket_name, seed_players, year_month_list, headers, logger, max_depth=1, request_budget=1000,
+                         max_in_flight=8, session=None, compression=None, zstd_dict=None, shard_index=0, shard_count=1,
+                         bloom_capacity=1_000_000, bloom_error_rate=0.01):
+    """
+    Grow the player universe breadth-first through opponents found in game archives.
+
+    Depth 0 is the seed players (whose archives are usually already in GCS and are read
+    from there without spending API requests). Every white/black username in a depth-d
+    archive that has not been seen joins the depth d+1 frontier, up to max_depth. Seen
+    players are tracked in a PlayerBloomFilter and each frontier is streamed through a
+    temporary file in fixed-size chunks, so memory stays flat however large the graph
+    grows. New archives are only requested for months in the player's archive list
+    (see filter_combinations_by_player_archives). Crawling stops once request_budget
+    API requests have been spent.
+
+    Args:
+        bucket_name: GCS bucket name
+        seed_players: List of player usernames to start from (depth 0)
+        year_month_list: List of year/month strings whose archives are crawled
+        headers: Request headers
+        logger: Cloud logging logger instance
+        max_depth: Number of opponent hops to expand beyond the seeds
+        request_budget: Maximum number of API requests for the crawl
+        max_in_flight: Maximum number of concurrent archive reads/requests
+        session: Optional pooled session shared across requests
+        compression: Optional storage codec for uploaded archives ("gzip" or "zstd")
+        zstd_dict: Optional trained zstd dictionary for "zstd"
+        shard_index: Index of this worker's shard - only players in it are crawled
+        shard_count: Total number of shards
+        bloom_capacity: Expected number of distinct players seen by the crawl
+        bloom_error_rate: Bloom filter false positive rate at capacity
+
+    Returns:
+        Dictionary with players crawled, API requests made, archives uploaded and depth reached
+    """
+    seen = PlayerBloomFilter(bloom_capacity, bloom_error_rate)
+    existing_endpoints = set(list_existing_player_endpoints(bucket_name, year_month_list, logger))
+    fetch_archive = partial(_fetch_archive_opponents, bucket_name, existing_endpoints=existing_endpoints, headers=headers,
+                            logger=logger, session=session, compression=compression, zstd_dict=zstd_dict)
+    chunk_size = max_in_flight * 4
+    summary = {"players_crawled": 0, "requests": 0, "uploaded": 0, "depth_reached": 0}
+    budget_exhausted = False
+
+    frontier = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+    for player in seed_players:
+        if seen.add(player.lower()):
+            frontier.write(player.lower() + "\n")
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for depth in range(max_depth + 1):
+            frontier.seek(0)
+            next_frontier = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+            frontier_size = 0
+            summary["depth_reached"] = depth
+
+            while True:
+                players = [line.rstrip("\n") for line in islice(frontier, chunk_size)]
+                if not players:
+                    break
+                endpoints = [f"player/{player}/games/{period}" for player in players for period in year_month_list]
+                new_endpoints = [endpoint for endpoint in endpoints if endpoint not in existing_endpoints]
+                # One archive list lookup per player (counted even when served from the GCS cache),
+                # so only the months an opponent actually played are requested
+                lookup_players = {endpoint.split("/")[1] for endpoint in new_endpoints} - _PLAYER_ARCHIVE_PERIODS_CACHE.keys()
+                if len(lookup_players) > request_budget - summary["requests"]:
+                    # Look up as many players as the budget allows and leave the rest uncrawled
+                    skipped_players = set(sorted(lookup_players)[request_budget - summary["requests"]:])
+                    lookup_players -= skipped_players
+                    new_endpoints = [endpoint for endpoint in new_endpoints if endpoint.split("/")[1] not in skipped_players]
+                    budget_exhausted = True
+                summary["requests"] += len(lookup_players)
+
+                planned_endpoints = []
+                if new_endpoints:
+                    planned_endpoints = filter_combinations_by_player_archives(bucket_name, new_endpoints, year_month_list, headers, logger, max_in_flight, session)
+                if len(planned_endpoints) > request_budget - summary["requests"]:
+                    # Spend what is left of the budget on this chunk, then stop
+                    planned_endpoints = planned_endpoints[:request_budget - summary["requests"]]
+                    budget_exhausted = True
+                planned_endpoints = set(planned_endpoints)
+                endpoints = [endpoint for endpoint in endpoints if endpoint in existing_endpoints or endpoint in planned_endpoints]
+
+                uploaded_endpoints = []
+                for endpoint, (requested, uploaded, usernames) in zip(endpoints, executor.map(fetch_archive, endpoints)):
+                    summary["requests"] += requested
+                    if uploaded:
+                        uploaded_endpoints.append(endpoint)
+                    if depth == max_depth:
+                        continue
+                    for username in usernames:
+                        if _player_shard(username, shard_count) == shard_index and seen.add(username):
+                            next_frontier.write(username + "\n")
+                            frontier_size += 1
+
+                summary["players_crawled"] += len(players)
+                summary["uploaded"] += len(uploaded_endpoints)
+                record_player_endpoints_in_manifest(bucket_name, uploaded_endpoints, logger)
+                if budget_exhausted:
+                    break
 
-        # Extracting player and period components from url to build GCS path to save to
-        match = re.search(r'player/([^/]+)/games/(\d{4}/\d{2})', url)
-        if match:
-            player = match.group(1)
-            period = match.group(2)
-        gcs_player_endpoint = f"player/{player}/games/{period}"
+            frontier.close()
+            frontier = next_frontier
+            log_printer(f"Crawl depth {depth} complete | Players crawled: {summary['players_crawled']} | Next frontier: {frontier_size} | API requests: {summary['requests']}/{request_budget}", logger)
+            if frontier_size == 0 or budget_exhausted:
+                break
 
-        # Saving Data to GCS
-        upload_json_to_gcs_bucket(bucket_name, gcs_player_endpoint, games_response, logger)
+    frontier.close()
+    log_printer(f"Opponent crawl finished | Players seen: {seen.count} | Archives uploaded: {summary['uploaded']} | Depth reached: {summary['depth_reached']}", logger)
+    return summary
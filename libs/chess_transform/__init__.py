@@ -12,8 +12,16 @@ from .chess_transform import (
     extract_eco_url_from_pgn,
     return_missing_data_list,
     gcs_action_taken_dict,
+    GAMES_DATAFRAME_COLUMNS,
+    transform_games_dataframe,
+    parse_games_content,
     generate_games_dataframe,
+    generate_games_dataframes_parallel,
+    parse_games_arrow_table,
+    deduplicate_arrow_table,
+    flatten_game_record,
     deletion_interaction_list_handler,
+    GamesBatchLoader,
 )
 
 __version__ = "0.1.0"
@@ -26,6 +34,14 @@ __all__ = [
     "extract_eco_url_from_pgn",
     "return_missing_data_list",
     "gcs_action_taken_dict",
+    "GAMES_DATAFRAME_COLUMNS",
+    "transform_games_dataframe",
+    "parse_games_content",
     "generate_games_dataframe",
+    "generate_games_dataframes_parallel",
+    "parse_games_arrow_table",
+    "deduplicate_arrow_table",
+    "flatten_game_record",
     "deletion_interaction_list_handler",
+    "GamesBatchLoader",
 ]
@@ -4,17 +4,27 @@ Chess Game Data Transformation Functions
 Functions for transforming and loading chess game data from GCS to BigQuery.
 """
 
+import os
 import re
 import json
 import numpy as np
 import pandas as pd
-from datetime import date, datetime
+import pyarrow as pa
+import pyarrow.json as pa_json
+import pyarrow.compute as pc
+from google.cloud import bigquery
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import date, datetime, timezone
 from dateutil.relativedelta import relativedelta
 
 from gcp_common import (
     download_content_from_gcs,
     delete_gcs_object,
     query_bq_to_dataframe,
+    append_df_to_bigquery_table,
+    append_arrow_table_to_bigquery_table,
+    merge_new_rows_into_bigquery_table,
     log_printer,
 )
 
@@ -79,6 +89,9 @@ def compare_sets_and_return_non_matches(col1, col2):
     return non_matching
 
 
+_ECO_URL_PATTERN = re.compile(r'\[ECOUrl\s+"([^"]+)"\]')
+
+
 def extract_eco_url_from_pgn(pgn, logger):
     """
     Extract ECO URL from PGN string.
@@ -90,7 +103,7 @@ def extract_eco_url_from_pgn(pgn, logger):
     Returns:
         ECO URL string or "ECO Not Found"
     """
-    match = re.search(r'\[ECOUrl\s+"([^"]+)"\]', pgn)
+    match = _ECO_URL_PATTERN.search(pgn)
     if match:
         eco_url = match.group(1)
         return eco_url
@@ -99,30 +112,56 @@ def extract_eco_url_from_pgn(pgn, logger):
         log_printer("ECO URL not found.", logger)
 
 
-def return_missing_data_list(bq_datapoint, table_id, local_list, location, logger):
+# Candidates per existence-check query, keeping the array parameter well under the request size limit
+_EXISTENCE_CHECK_CHUNK_SIZE = 100_000
+
+
+def return_missing_data_list(bq_datapoint, table_id, local_list, location, logger, partition_range=None):
     """
     Query BigQuery to find missing datapoints not yet in the table.
 
+    The local values are pushed down as an array query parameter and semi-joined
+    with UNNEST, so BigQuery returns only the ones that already exist. With a
+    partition_range, only those partitions are scanned. Bytes scanned and the
+    result size therefore follow the local list, not the table.
+
     Args:
         bq_datapoint: Column name to query
         table_id: Full BigQuery table ID
         local_list: List of local datapoints
         location: BigQuery location (e.g., 'EU', 'US')
         logger: Cloud logging logger instance
+        partition_range: Optional (partition_column, first_date, last_date) to restrict the scan to,
+                         e.g. ("game_date", batch_min, batch_max) or ("gcs_game_month", month, month)
 
     Returns:
         List of missing datapoints
     """
-    # Check BQ for Unique List of Datapoints In the Database
+    candidates = list({value.item() if isinstance(value, np.generic) else value for value in local_list if pd.notna(value)})
+    if not candidates:
+        return []
+    parameter_type = "INT64" if all(isinstance(value, int) for value in candidates) else "STRING"
+
+    partition_clause = ""
+    if partition_range is not None:
+        partition_column, first_date, last_date = partition_range
+        partition_clause = f"\n          AND {partition_column} BETWEEN DATE '{str(first_date)[:10]}' AND DATE '{str(last_date)[:10]}'"
+
+    # Check BQ for which of the local datapoints already exist in the table
     query = f"""
         SELECT DISTINCT {bq_datapoint} FROM `{table_id}`
+        WHERE {bq_datapoint} IN UNNEST(@candidates){partition_clause}
     """
 
-    log_printer(f"Querying List Of Unique {bq_datapoint} Already Landing in BigQuery: {query}", logger)
-    df_bq_unique = query_bq_to_dataframe(query, location, logger)
+    log_printer(f"Querying which of {len(candidates)} {bq_datapoint} Already Landed in BigQuery: {query}", logger)
+    existing = []
+    for start in range(0, len(candidates), _EXISTENCE_CHECK_CHUNK_SIZE):
+        query_parameters = [bigquery.ArrayQueryParameter("candidates", parameter_type, candidates[start:start + _EXISTENCE_CHECK_CHUNK_SIZE])]
+        df_bq_existing = query_bq_to_dataframe(query, location, None, query_parameters)
+        existing.extend(df_bq_existing[bq_datapoint].tolist())
 
     # Determine datapoints that are missing from BigQuery Table
-    missing_from_bq = compare_sets_and_return_non_matches(local_list, df_bq_unique[bq_datapoint])
+    missing_from_bq = compare_sets_and_return_non_matches(candidates, existing)
     log_printer(f"Number of {bq_datapoint} from local list: {len(local_list)}", logger)
     log_printer(f"Number of missing {bq_datapoint} from BQ Table: {len(missing_from_bq)}", logger)
 
@@ -142,8 +181,8 @@ def gcs_action_taken_dict(gcs_filename, action_taken, logger):
         Dictionary with GCS interaction metadata
     """
     # Dictionary to determine what action was taken when handling the GCS data
-    # To load into BQ table later
-    _, _, _, year, month = gcs_filename.split("/")
+    # To load into BQ table later (incremental segments sit below the month: .../{year}/{month}/increments/{end_time})
+    year, month = gcs_filename.split("/")[3:5]
 
     interaction_dict = {
         "gcs_endpoint" :  gcs_filename,
@@ -155,41 +194,40 @@ def gcs_action_taken_dict(gcs_filename, action_taken, logger):
     return interaction_dict
 
 
-def generate_games_dataframe(gcs_filename: str, bucket_name: str, logger):
+GAMES_DATAFRAME_COLUMNS = [
+    "game_id",
+    "url",
+    "game_date",
+    "ingested_dt",
+    "time_control",
+    "end_time",
+    "rated",
+    "time_class",
+    "rules",
+    "white",
+    "black",
+    "accuracies",
+    "eco",
+    "opening"
+]
+
+
+def transform_games_dataframe(df: pd.DataFrame, logger):
     """
-    Download and transform chess game data from GCS into DataFrame.
+    Derive the games table columns from a DataFrame of raw archive games.
+
+    Every step is vectorised: the ECO URL is pulled from the PGN with a single
+    str.extract, opening names are derived once per distinct ECO URL (factorize),
+    game IDs come from a vectorised rpartition, and game_date is converted straight
+    from datetime64 seconds to dates.
 
     Args:
-        gcs_filename: GCS filename path
-        bucket_name: GCS bucket name
+        df: DataFrame of games from a monthly archive (at least one row)
         logger: Cloud logging logger instance
 
     Returns:
-        Tuple of (DataFrame, interaction_dict) or (None, interaction_dict) if empty
+        DataFrame with GAMES_DATAFRAME_COLUMNS in order
     """
-    # Download Data From GCS and Store into DataFrame
-    content = download_content_from_gcs(gcs_filename, bucket_name ,logger)
-    data_dict = json.loads(content).get("games")
-    df = pd.DataFrame(data_dict)
-
-    # Define column order for dataframe
-    columns = [
-        "game_id",
-        "url",
-        "game_date",
-        "ingested_dt",
-        "time_control",
-        "end_time",
-        "rated",
-        "time_class",
-        "rules",
-        "white",
-        "black",
-        "accuracies",
-        "eco",
-        "opening"
-    ]
-
     # Create empty column for any datapoints that don't exist
     if "accuracies" not in df.columns:
         df["accuracies"] = dict()
@@ -200,41 +238,290 @@ def generate_games_dataframe(gcs_filename: str, bucket_name: str, logger):
     if "pgn" not in df.columns:
         df["pgn"] = np.nan
 
-    # Transformations for non-zero length
-    if len(df) > 0:
+    # ECO from the archive when present, otherwise from the PGN header
+    pgn_eco = df["pgn"].astype(object).str.extract(_ECO_URL_PATTERN, expand=False).fillna("ECO Not Found")
+    df["eco"] = df["eco"].fillna(pgn_eco).astype(str)
+
+    # Only a few hundred distinct openings per archive, so name each once and broadcast
+    eco_codes, eco_urls = pd.factorize(df["eco"])
+    opening_names = np.array([extract_last_url_component(url).replace("-", " ") for url in eco_urls], dtype=object)
+    df["opening"] = pd.Series(opening_names[eco_codes], index=df.index, dtype=object).astype(str)
+
+    df["game_id"] = df["url"].str.rpartition("/")[2].astype(int)
+    df["game_date"] = df["end_time"].to_numpy().astype("datetime64[s]").astype("datetime64[D]").astype(object)
+    df["ingested_dt"] = pd.to_datetime(datetime.now())
+
+    return df[GAMES_DATAFRAME_COLUMNS]
 
-        # Apply Transformations
-        df["eco"] = df.apply(
-            lambda row: row["eco"] if pd.notna(row["eco"]) else (
-                extract_eco_url_from_pgn(row["pgn"], logger) if pd.notna(row["pgn"]) else "ECO Not Found"
-            ),
-            axis=1
-        )
 
-        df["opening"] = df["eco"].apply(
-            lambda x: extract_last_url_component(x).replace("-", " ") if pd.notna(x) else "ECO Not Found"
-        )
+def parse_games_content(gcs_filename: str, content: str, logger=None):
+    """
+    Parse a downloaded monthly archive into the games DataFrame.
+
+    Pure CPU work with no GCS access, so it can run in a worker process.
 
-        df["game_id"] = df["url"].apply(lambda x: extract_last_url_component(x))
-        df["game_date"] = pd.to_datetime(df["end_time"], unit="s").dt.strftime('%Y-%m-%d')
-        df["game_date"] = pd.to_datetime(df["game_date"]).dt.date
-        df["ingested_dt"] = pd.to_datetime(datetime.now())
+    Args:
+        gcs_filename: GCS filename path the content was downloaded from
+        content: Archive JSON text
+        logger: Optional Cloud logging logger instance
 
-        # Fixing Types
-        df["game_id"] = df["game_id"].astype(int)
+    Returns:
+        Tuple of (DataFrame, interaction_dict) or (None, interaction_dict) if empty
+    """
+    data_dict = json.loads(content).get("games")
+    df = pd.DataFrame(data_dict)
+
+    # Transformations for non-zero length
+    if len(df) > 0:
 
         # Generate interaction dict
         interaction_dict = gcs_action_taken_dict(gcs_filename, "Loaded", logger)
 
-        return df[columns], interaction_dict
+        return transform_games_dataframe(df, logger), interaction_dict
 
     # Ammend action to take for GCS data that is empty (prepping for deletion)
-    if len(df) == 0 :
+    interaction_dict = gcs_action_taken_dict(gcs_filename, "Deleted", logger)
 
-        # Generate interaction dict
-        interaction_dict = gcs_action_taken_dict(gcs_filename, "Deleted", logger)
+    return None, interaction_dict
+
+
+def generate_games_dataframe(gcs_filename: str, bucket_name: str, logger):
+    """
+    Download and transform chess game data from GCS into DataFrame.
+
+    Args:
+        gcs_filename: GCS filename path
+        bucket_name: GCS bucket name
+        logger: Cloud logging logger instance
+
+    Returns:
+        Tuple of (DataFrame, interaction_dict) or (None, interaction_dict) if empty
+    """
+    # Download Data From GCS and Store into DataFrame
+    content = download_content_from_gcs(gcs_filename, bucket_name ,logger)
+    return parse_games_content(gcs_filename, content, logger)
+
+
+_ARROW_DERIVED_COLUMNS = ("game_id", "game_date", "ingested_dt", "opening")
+
+
+def _nullable_arrow_type(data_type):
+    """Return data_type with every nested struct field made nullable."""
+    if pa.types.is_struct(data_type):
+        return pa.struct([pa.field(f.name, _nullable_arrow_type(f.type)) for f in data_type])
+    if pa.types.is_list(data_type):
+        return pa.list_(_nullable_arrow_type(data_type.value_type))
+    return data_type
+
+
+def _archive_games_arrow_type(arrow_schema: pa.Schema):
+    """
+    Arrow type of the raw "games" list in a monthly archive.
+
+    Taken from the games table schema minus the derived columns, plus the PGN (needed
+    for the ECO fallback). Everything is nullable while parsing; REQUIRED columns are
+    enforced by the final cast to the table schema.
+    """
+    fields = [pa.field(f.name, _nullable_arrow_type(f.type)) for f in arrow_schema if f.name not in _ARROW_DERIVED_COLUMNS]
+    fields.append(pa.field("pgn", pa.string()))
+    return pa.list_(pa.struct(fields))
+
+
+def _last_url_component(urls):
+    """Vectorised extract_last_url_component for an Arrow string array."""
+    return pc.struct_field(pc.extract_regex(urls, r"(?P<component>[^/]*)$"), [0])
 
-        return None, interaction_dict
+
+def parse_games_arrow_table(gcs_filename: str, content, arrow_schema: pa.Schema, logger=None):
+    """
+    Parse a downloaded monthly archive straight into an Arrow table typed by the games schema.
+
+    The archive bytes are parsed by pyarrow.json (no Python objects per game) and the
+    derived columns are computed with pyarrow.compute, so white/black/accuracies stay
+    struct columns. Produces the same values as parse_games_content.
+
+    Args:
+        gcs_filename: GCS filename path the content was downloaded from
+        content: Archive JSON bytes (or text)
+        arrow_schema: Arrow schema of the games table (see bigquery_schema_to_arrow_schema)
+        logger: Optional Cloud logging logger instance
+
+    Returns:
+        Tuple of (pyarrow.Table, interaction_dict) or (None, interaction_dict) if empty
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    archive = pa_json.read_json(
+        pa.BufferReader(content),
+        read_options=pa_json.ReadOptions(block_size=len(content) + 1),
+        parse_options=pa_json.ParseOptions(
+            explicit_schema=pa.schema([pa.field("games", _archive_games_arrow_type(arrow_schema))]),
+            unexpected_field_behavior="ignore",
+            newlines_in_values=True,
+        ),
+    )
+    games = pa.Table.from_struct_array(archive.column("games").combine_chunks().flatten())
+
+    # Ammend action to take for GCS data that is empty (prepping for deletion)
+    if games.num_rows == 0:
+        return None, gcs_action_taken_dict(gcs_filename, "Deleted", logger)
+
+    # ECO from the archive when present, otherwise from the PGN header
+    pgn_eco = pc.extract_regex(games["pgn"], r'\[ECOUrl\s+"(?P<eco>[^"]+)"\]')
+    pgn_eco = pc.if_else(pc.is_valid(pgn_eco), pc.struct_field(pgn_eco, [0]), None)
+    eco = pc.coalesce(games["eco"], pgn_eco, "ECO Not Found")
+
+    columns = {name: games[name] for name in games.column_names}
+    columns["eco"] = eco
+    columns["opening"] = pc.replace_substring(_last_url_component(eco), "-", " ")
+    columns["game_id"] = pc.cast(_last_url_component(games["url"]), pa.int64())
+    columns["game_date"] = pc.cast(pc.cast(games["end_time"], pa.timestamp("s")), pa.date32())
+    columns["ingested_dt"] = pa.repeat(pa.scalar(datetime.now(timezone.utc), arrow_schema.field("ingested_dt").type), games.num_rows)
+
+    table = pa.table([columns[name] for name in arrow_schema.names], names=arrow_schema.names).cast(arrow_schema)
+    return table, gcs_action_taken_dict(gcs_filename, "Loaded", logger)
+
+
+def deduplicate_arrow_table(table: pa.Table, key: str) -> pa.Table:
+    """
+    Drop rows with a repeated key, keeping the first occurrence (drop_duplicates(keep="first")).
+
+    Args:
+        table: pyarrow.Table
+        key: Column name to deduplicate on
+
+    Returns:
+        pyarrow.Table with unique keys, in original row order
+    """
+    row_numbers = table.select([key]).append_column("row_number", pa.array(np.arange(table.num_rows)))
+    first_rows = row_numbers.group_by(key, use_threads=False).aggregate([("row_number", "min")])["row_number_min"]
+    return table.take(np.sort(first_rows.to_numpy()))
+
+
+def _chain_parse_after_download(download_future, parse_executor, parse_function, gcs_filename):
+    """
+    Submit the parse of an archive to the process pool as soon as its download completes.
+
+    Returns:
+        Future resolving to the parse_function result (or the download/parse error)
+    """
+    result = Future()
+
+    def copy_parse_result(parse_future):
+        if parse_future.exception() is not None:
+            result.set_exception(parse_future.exception())
+        else:
+            result.set_result(parse_future.result())
+
+    def on_downloaded(future):
+        try:
+            parse_future = parse_executor.submit(parse_function, gcs_filename, future.result())
+        except Exception as e:
+            result.set_exception(e)
+            return
+        parse_future.add_done_callback(copy_parse_result)
+
+    download_future.add_done_callback(on_downloaded)
+    return result
+
+
+def generate_games_dataframes_parallel(gcs_filenames, bucket_name: str, logger, download_workers=8, parse_workers=None, max_pending=None,
+                                       parse_function=parse_games_content, decode=True):
+    """
+    Download and transform many archives with pipelined I/O and parsing.
+
+    Downloads run on a thread pool and each completed download is handed straight
+    to a process pool for the JSON -> DataFrame work, so GCS latency overlaps with
+    parsing. Results are yielded in input order; at most max_pending archives are
+    downloaded or parsed ahead of the consumer, which bounds memory.
+
+    Args:
+        gcs_filenames: Iterable of GCS filename paths
+        bucket_name: GCS bucket name
+        logger: Cloud logging logger instance
+        download_workers: Concurrent GCS downloads (default: 8)
+        parse_workers: Parsing processes (default: CPU count)
+        max_pending: Maximum archives in flight ahead of the consumer (default: 2 x (download_workers + parse_workers))
+        parse_function: Picklable callable (gcs_filename, content) -> (result, interaction_dict)
+                        (default: parse_games_content; e.g. a functools.partial of parse_games_arrow_table)
+        decode: Hand the parser text (True) or raw bytes (False)
+
+    Yields:
+        Tuples of (gcs_filename, DataFrame/Table or None, interaction_dict), in input order
+    """
+    parse_workers = parse_workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * (download_workers + parse_workers)
+    log_printer(f"Transforming archives with {download_workers} download threads, {parse_workers} parse processes, {max_pending} archives in flight", logger)
+
+    with ThreadPoolExecutor(max_workers=download_workers) as download_executor, \
+            ProcessPoolExecutor(max_workers=parse_workers) as parse_executor:
+
+        pending = deque()
+        filenames = iter(gcs_filenames)
+        while True:
+            # Keep the window full, then hand back the oldest result once it is ready
+            for gcs_filename in filenames:
+                download_future = download_executor.submit(download_content_from_gcs, gcs_filename, bucket_name, None, decode)
+                pending.append((gcs_filename, _chain_parse_after_download(download_future, parse_executor, parse_function, gcs_filename)))
+                if len(pending) >= max_pending:
+                    break
+
+            if not pending:
+                break
+
+            gcs_filename, result = pending.popleft()
+            df, interaction_dict = result.result()
+            yield gcs_filename, df, interaction_dict
+
+
+def flatten_game_record(game: dict, ingested_dt=None):
+    """
+    Flatten one archive game into a typed row with the columns generate_games_dataframe uses.
+
+    Nested white/black/accuracies records become prefixed scalar columns so the row
+    can be written to columnar formats (e.g. Parquet) without nested types.
+
+    Args:
+        game: Game dictionary from a Chess.com monthly archive
+        ingested_dt: Optional ingestion timestamp (default: now, UTC)
+
+    Returns:
+        Dictionary of flat column values, including game_month for partitioning
+    """
+    eco = game.get("eco")
+    if eco is None:
+        eco = extract_eco_url_from_pgn(game["pgn"], None) if game.get("pgn") is not None else "ECO Not Found"
+
+    white = game.get("white", {})
+    black = game.get("black", {})
+    accuracies = game.get("accuracies") or {}
+    game_date = datetime.fromtimestamp(game["end_time"], tz=timezone.utc).date()
+
+    return {
+        "game_id": int(extract_last_url_component(game["url"])),
+        "url": game["url"],
+        "game_date": game_date,
+        "game_month": game_date.replace(day=1),
+        "ingested_dt": ingested_dt or datetime.now(timezone.utc),
+        "time_control": game.get("time_control"),
+        "end_time": game["end_time"],
+        "rated": game.get("rated"),
+        "time_class": game.get("time_class"),
+        "rules": game.get("rules"),
+        "white_uuid": white.get("uuid"),
+        "white_username": white.get("username"),
+        "white_rating": white.get("rating"),
+        "white_result": white.get("result"),
+        "black_uuid": black.get("uuid"),
+        "black_username": black.get("username"),
+        "black_rating": black.get("rating"),
+        "black_result": black.get("result"),
+        "accuracy_white": accuracies.get("white"),
+        "accuracy_black": accuracies.get("black"),
+        "eco": eco,
+        "opening": extract_last_url_component(eco).replace("-", " "),
+    }
 
 
 def deletion_interaction_list_handler(df, bucket_name, logger):
@@ -251,3 +538,170 @@ def deletion_interaction_list_handler(df, bucket_name, logger):
     for gcs_filename in df_to_banish_to_shadow_realm["gcs_endpoint"]:
          log_printer(f"No data in following GCS endpoint: {gcs_filename}", logger)
          delete_gcs_object(gcs_filename, bucket_name, logger)
+
+
+class GamesBatchLoader:
+    """
+    Streaming loader that flushes transformed endpoints to BigQuery in bounded batches.
+
+    Endpoint results (pandas DataFrames or Arrow tables) are buffered until
+    max_rows or max_bytes is reached. Each flush then does the following:
+    - collapses duplicate game_ids within the batch
+    - deletes the batch's empty GCS objects
+    - loads the games that are not yet in BigQuery (earlier batches included)
+    - records the batch's endpoints in loading_completed
+
+    With dedup_mode "query", the game_ids already in BigQuery are fetched with
+    return_missing_data_list and filtered out in Python before appending. With
+    "merge", the batch goes through a staging table and a MERGE restricted to its
+    game_date partitions (merge_new_rows_into_bigquery_table), so the dedup cost
+    scales with the batch rather than with the table.
+
+    Memory is bounded by one batch. A crash loses at most the unflushed batch,
+    whose endpoints are picked up again by the next run. An endpoint whose games
+    landed but which was not yet recorded is deduplicated on game_id when it is
+    re-run.
+
+    Args:
+        table_id_games: Full table ID of the games table
+        table_id_loading_completed: Full table ID of the loading_completed table
+        bucket_name: GCS bucket name
+        location: BigQuery location (e.g., 'EU', 'US')
+        logger: Cloud logging logger instance
+        max_rows: Flush once this many game rows are buffered
+        max_bytes: Flush once the buffered frames take this many bytes
+        dry_run: Filter and deduplicate batches without writing to BigQuery or GCS (TEST/DEV).
+                 Batches are always checked against the games table, so the row count
+                 matches what a real run would insert in either dedup_mode
+        append_backend: BigQuery append backend ("auto", "load_job" or "storage_write").
+                        Games are appended exactly-once, i.e. through a pending write stream
+                        when the Storage Write API is used
+        dedup_mode: "query" or "merge" (see above)
+    """
+
+    DEDUP_MODES = ("query", "merge")
+
+    def __init__(self, table_id_games, table_id_loading_completed, bucket_name, location, logger,
+                 max_rows=250_000, max_bytes=512 * 1024 * 1024, dry_run=False, append_backend="auto", dedup_mode="query"):
+        if dedup_mode not in self.DEDUP_MODES:
+            raise ValueError(f"dedup_mode must be one of {self.DEDUP_MODES}, got {dedup_mode}")
+        self.table_id_games = table_id_games
+        self.table_id_loading_completed = table_id_loading_completed
+        self.bucket_name = bucket_name
+        self.location = location
+        self.logger = logger
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.dry_run = dry_run
+        self.append_backend = append_backend
+        self.dedup_mode = dedup_mode
+        self.batches_flushed = 0
+        self.rows_loaded = 0
+        self.endpoints_recorded = 0
+        self.last_batch = None
+        self.last_interaction_list = None
+        self._frames = []
+        self._interaction_dicts = []
+        self._rows = 0
+        self._bytes = 0
+
+    @staticmethod
+    def _frame_nbytes(frame):
+        """Approximate in-memory size of a DataFrame or Arrow table."""
+        if isinstance(frame, pa.Table):
+            return frame.nbytes
+        return int(frame.memory_usage(index=False, deep=True).sum())
+
+    def add(self, frame, interaction_dict):
+        """
+        Buffer one endpoint's transform result, flushing if a threshold is reached.
+
+        Args:
+            frame: DataFrame or Arrow table of games, or None for an empty endpoint
+            interaction_dict: Interaction dict from gcs_action_taken_dict
+        """
+        self._interaction_dicts.append(interaction_dict)
+        if frame is not None:
+            self._frames.append(frame)
+            self._rows += len(frame)
+            self._bytes += self._frame_nbytes(frame)
+
+        if self._rows >= self.max_rows or self._bytes >= self.max_bytes:
+            self.flush()
+
+    @staticmethod
+    def _deduplicate_batch(batch):
+        """Collapse duplicate game_ids within the batch, keeping the first."""
+        if isinstance(batch, pa.Table):
+            return deduplicate_arrow_table(batch, "game_id")
+        return batch.drop_duplicates(subset="game_id", keep="first")
+
+    def _drop_games_in_bigquery(self, batch):
+        """Drop game_ids already in the games table (dedup_mode "query"), scanning only the batch's game_date range."""
+        if isinstance(batch, pa.Table):
+            game_date_range = pc.min_max(batch["game_date"])
+            partition_range = ("game_date", game_date_range["min"].as_py(), game_date_range["max"].as_py())
+            games_missing_from_bq = return_missing_data_list("game_id", self.table_id_games, batch["game_id"].to_pylist(), self.location, self.logger, partition_range)
+            return batch.filter(pc.is_in(batch["game_id"], value_set=pa.array(games_missing_from_bq, pa.int64())))
+
+        partition_range = ("game_date", batch["game_date"].min(), batch["game_date"].max())
+        games_missing_from_bq = return_missing_data_list("game_id", self.table_id_games, batch["game_id"], self.location, self.logger, partition_range)
+        return batch[batch["game_id"].isin(games_missing_from_bq)]
+
+    def _load_games(self, batch):
+        """Load the batch's new games into the games table, returning the number of rows inserted."""
+        if self.dedup_mode == "merge":
+            return merge_new_rows_into_bigquery_table(batch, self.table_id_games, "game_id", self.location, self.logger, partition_field="game_date")
+
+        if isinstance(batch, pa.Table):
+            append_arrow_table_to_bigquery_table(batch, self.table_id_games, self.logger, self.append_backend, exactly_once=True)
+        else:
+            append_df_to_bigquery_table(batch, self.table_id_games, self.logger, self.append_backend, exactly_once=True)
+        return len(batch)
+
+    def flush(self):
+        """
+        Load the buffered games and record their endpoints in loading_completed.
+
+        Returns:
+            Number of game rows loaded in this batch
+        """
+        if not self._interaction_dicts:
+            return 0
+
+        batch = None
+        if self._frames:
+            batch = pa.concat_tables(self._frames) if isinstance(self._frames[0], pa.Table) else pd.concat(self._frames)
+            buffered_rows = len(batch)
+            batch = self._deduplicate_batch(batch)
+            # A dry run never reaches the MERGE, so count what it would insert with the same pruned lookup
+            checked_in_bigquery = self.dedup_mode == "query" or self.dry_run
+            if checked_in_bigquery:
+                batch = self._drop_games_in_bigquery(batch)
+            log_printer(f"Batch {self.batches_flushed + 1}: {buffered_rows} rows buffered | {buffered_rows - len(batch)} duplicated{' or already in BigQuery' if checked_in_bigquery else ''} | {len(batch)} to {'merge' if self.dedup_mode == 'merge' else 'load'}", self.logger)
+        df_interaction_list = pd.DataFrame(self._interaction_dicts)
+
+        rows_loaded = 0
+        if not self.dry_run:
+            deletion_interaction_list_handler(df_interaction_list, self.bucket_name, self.logger)
+            if batch is not None and len(batch) > 0:
+                rows_loaded = self._load_games(batch)
+            append_df_to_bigquery_table(df_interaction_list, self.table_id_loading_completed, self.logger, self.append_backend)
+        elif batch is not None:
+            rows_loaded = len(batch)
+
+        self.batches_flushed += 1
+        self.rows_loaded += rows_loaded
+        self.endpoints_recorded += len(df_interaction_list)
+        self.last_batch = batch
+        self.last_interaction_list = df_interaction_list
+        self._frames = []
+        self._interaction_dicts = []
+        self._rows = 0
+        self._bytes = 0
+        return rows_loaded
+
+    def close(self):
+        """Flush the remaining buffer and log a summary of the run."""
+        self.flush()
+        log_printer(f"{'Dry run: ' if self.dry_run else ''}{self.batches_flushed} batches flushed | {self.rows_loaded} games loaded to {self.table_id_games} | {self.endpoints_recorded} endpoints recorded in {self.table_id_loading_completed}", self.logger)
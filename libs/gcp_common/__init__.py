@@ -12,7 +12,20 @@ from .gcp_common import (
     append_prefix_to_gcs_files,
     rename_prefix_of_gcs_files,
     upload_json_to_gcs_bucket,
+    get_gcs_upload_byte_counts,
+    compress_payload,
+    decompress_payload,
+    train_zstd_dictionary,
+    upload_zstd_dictionary,
+    load_zstd_dictionary,
     list_files_in_gcs,
+    list_files_in_gcs_globs,
+    read_gcs_manifest,
+    update_gcs_manifest,
+    append_to_gcs_object,
+    stat_gcs_object,
+    get_gcs_object_metadata,
+    update_gcs_object_metadata,
     download_content_from_gcs,
     delete_gcs_object,
     create_bigquery_table,
@@ -20,6 +33,11 @@ from .gcp_common import (
     check_bigquery_dataset_exists,
     check_bigquery_table_exists,
     append_df_to_bigquery_table,
+    bigquery_schema_to_arrow_schema,
+    append_arrow_table_to_bigquery_table,
+    append_rows_with_storage_write_api,
+    merge_new_rows_into_bigquery_table,
+    STORAGE_WRITE_MAX_ROWS,
     query_bq_to_dataframe,
 )
 
@@ -33,7 +51,20 @@ __all__ = [
     "append_prefix_to_gcs_files",
     "rename_prefix_of_gcs_files",
     "upload_json_to_gcs_bucket",
+    "get_gcs_upload_byte_counts",
+    "compress_payload",
+    "decompress_payload",
+    "train_zstd_dictionary",
+    "upload_zstd_dictionary",
+    "load_zstd_dictionary",
     "list_files_in_gcs",
+    "list_files_in_gcs_globs",
+    "read_gcs_manifest",
+    "update_gcs_manifest",
+    "append_to_gcs_object",
+    "stat_gcs_object",
+    "get_gcs_object_metadata",
+    "update_gcs_object_metadata",
     "download_content_from_gcs",
     "delete_gcs_object",
     "create_bigquery_table",
@@ -41,5 +72,10 @@ __all__ = [
     "check_bigquery_dataset_exists",
     "check_bigquery_table_exists",
     "append_df_to_bigquery_table",
+    "bigquery_schema_to_arrow_schema",
+    "append_arrow_table_to_bigquery_table",
+    "append_rows_with_storage_write_api",
+    "merge_new_rows_into_bigquery_table",
+    "STORAGE_WRITE_MAX_ROWS",
     "query_bq_to_dataframe",
 ]
@@ -5,15 +5,39 @@ Common functions for interacting with Google Cloud Platform services.
 """
 
 import os
+import gzip
 import json
+import uuid
 import base64
+import threading
+from functools import lru_cache
+import io
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from typing import List
 import google.cloud.logging as cloud_logging
 from google.cloud import secretmanager, storage, bigquery
 from google.cloud.exceptions import NotFound
-from datetime import datetime, timezone
+from google.api_core.exceptions import PreconditionFailed
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# Optional dependency: zstandard enables the "zstd" storage codec
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Optional dependency: google-cloud-bigquery-storage enables the Storage Write API append backend
+try:
+    from google.cloud import bigquery_storage_v1
+    from google.cloud.bigquery_storage_v1 import types as bigquery_storage_types
+    from google.cloud.bigquery_storage_v1 import writer as bigquery_storage_writer
+except ImportError:
+    bigquery_storage_v1 = None
 
 
 def log_printer(msg, logger, severity="INFO", console_print=True):
@@ -143,58 +167,455 @@ def rename_prefix_of_gcs_files(bucket_name, old_prefix, new_prefix, logger=None)
             print(f"Renamed {blob.name} -> {new_name}")
 
 
-def upload_json_to_gcs_bucket(bucket_name, object_name, data, logger=None):
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_COMPRESSION_CONTENT_TYPES = {
+    None: "application/json",
+    "gzip": "application/gzip",
+    "zstd": "application/zstd",
+}
+ZSTD_DICTIONARY_PREFIX = "zstd_dictionaries"
+
+
+def _require_zstandard():
+    """Raise ImportError if the optional zstandard package is not installed."""
+    if zstandard is None:
+        raise ImportError("zstd compression requires the zstandard package: pip install zstandard")
+
+
+def train_zstd_dictionary(samples, dict_size=112640):
+    """
+    Train a zstd dictionary from sample payloads.
+
+    Args:
+        samples: List of sample payloads as bytes (e.g. individual game JSON records)
+        dict_size: Target dictionary size in bytes
+
+    Returns:
+        zstandard.ZstdCompressionDict
+    """
+    _require_zstandard()
+    return zstandard.train_dictionary(dict_size, samples)
+
+
+def upload_zstd_dictionary(bucket_name, zstd_dict, logger=None):
+    """
+    Store a trained zstd dictionary in GCS under its dictionary ID.
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        zstd_dict: zstandard.ZstdCompressionDict
+        logger: Optional Cloud Logging logger instance
+
+    Returns:
+        Name of the dictionary object in GCS
+    """
+    object_name = f"{ZSTD_DICTIONARY_PREFIX}/{zstd_dict.dict_id()}"
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    bucket.blob(object_name).upload_from_string(zstd_dict.as_bytes(), content_type="application/octet-stream")
+    if logger:
+        log_printer(f"Uploaded zstd dictionary {zstd_dict.dict_id()} to {object_name}", logger)
+    return object_name
+
+
+@lru_cache(maxsize=8)
+def load_zstd_dictionary(bucket_name, dict_id):
+    """
+    Load a zstd dictionary from GCS by ID (cached per process).
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        dict_id: Dictionary ID embedded in zstd frames
+
+    Returns:
+        zstandard.ZstdCompressionDict
+    """
+    _require_zstandard()
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    dict_bytes = bucket.blob(f"{ZSTD_DICTIONARY_PREFIX}/{dict_id}").download_as_bytes()
+    return zstandard.ZstdCompressionDict(dict_bytes)
+
+
+def compress_payload(payload: bytes, compression=None, zstd_dict=None, level=None) -> bytes:
+    """
+    Compress a payload with the selected storage codec.
+
+    Args:
+        payload: Uncompressed bytes
+        compression: None, "gzip" or "zstd"
+        zstd_dict: Optional zstandard.ZstdCompressionDict used for "zstd"
+        level: Optional compression level (codec default when None)
+
+    Returns:
+        Compressed bytes (the payload unchanged when compression is None)
+    """
+    if compression is None:
+        return payload
+    if compression == "gzip":
+        return gzip.compress(payload, compresslevel=level or 6)
+    if compression == "zstd":
+        _require_zstandard()
+        compressor = zstandard.ZstdCompressor(level=level or 10, dict_data=zstd_dict)
+        return compressor.compress(payload)
+    raise ValueError(f"Unsupported compression codec: {compression}")
+
+
+def decompress_payload(payload: bytes, bucket_name=None, zstd_dict=None) -> bytes:
+    """
+    Detect the codec of a payload from its magic bytes and decompress it.
+
+    Dictionary-compressed zstd frames carry their dictionary ID, which is used to
+    load the matching dictionary from GCS when zstd_dict is not supplied.
+
+    Args:
+        payload: Possibly compressed bytes
+        bucket_name: Optional GCS bucket holding zstd dictionaries
+        zstd_dict: Optional zstandard.ZstdCompressionDict to decode with
+
+    Returns:
+        Uncompressed bytes
+    """
+    if payload[:2] == _GZIP_MAGIC:
+        return gzip.decompress(payload)
+
+    if payload[:4] == _ZSTD_MAGIC:
+        _require_zstandard()
+        dict_id = zstandard.get_frame_parameters(payload).dict_id
+        if dict_id and zstd_dict is None:
+            zstd_dict = load_zstd_dictionary(bucket_name, dict_id)
+        return zstandard.ZstdDecompressor(dict_data=zstd_dict).decompress(payload)
+
+    return payload
+
+
+_JSON_DELIMITERS = {ord("{"): ord("}"), ord("["): ord("]")}
+
+_GCS_UPLOAD_BYTE_COUNTS = {"objects": 0, "bytes_in": 0, "bytes_out": 0}
+_GCS_UPLOAD_BYTE_COUNTS_LOCK = threading.Lock()
+
+
+def _check_json_structure(payload: bytes) -> bool:
+    """
+    Cheap structural check that a payload looks like a single JSON object or array.
+
+    Only the outermost delimiters are inspected so the payload is never parsed.
+
+    Args:
+        payload: Raw JSON bytes
+
+    Returns:
+        True if the payload starts and ends with matching JSON delimiters
+    """
+    stripped = payload.strip()
+    return len(stripped) >= 2 and _JSON_DELIMITERS.get(stripped[0]) == stripped[-1]
+
+
+def get_gcs_upload_byte_counts():
+    """
+    Return process-wide byte counters for JSON uploads to GCS.
+
+    bytes_in is the size of the response bodies received, bytes_out the size
+    of the payloads written to GCS.
+
+    Returns:
+        Dictionary with objects, bytes_in and bytes_out counts
+    """
+    with _GCS_UPLOAD_BYTE_COUNTS_LOCK:
+        return dict(_GCS_UPLOAD_BYTE_COUNTS)
+
+
+def upload_json_to_gcs_bucket(bucket_name, object_name, data, logger=None, metadata=None, raw=False, validate=False,
+                              compression=None, zstd_dict=None, if_generation_match=None):
     """
     Upload JSON data to a GCS bucket.
 
     Args:
         bucket_name: Name of the GCS bucket
         object_name: Name of the object to create in GCS
-        data: Response object with .json() method
+        data: Response object with .json() method and .content bytes
         logger: Optional Cloud Logging logger instance
+        metadata: Optional dictionary of custom metadata to store on the object
+        raw: Upload the response bytes as received instead of parsing and re-serialising them
+        validate: In raw mode, check the payload's outer JSON structure before uploading
+        compression: Optional storage codec - None, "gzip" or "zstd"
+        zstd_dict: Optional trained zstandard.ZstdCompressionDict for "zstd"
+        if_generation_match: Optional generation precondition (0 = only create a new object);
+            raises google.api_core.exceptions.PreconditionFailed if it does not hold
 
     Returns:
         None
     """
+    body = data.content
+    if raw:
+        payload = body
+        if validate and not _check_json_structure(payload):
+            raise ValueError(f"Response for {object_name} is not a JSON object or array - refusing to upload")
+    else:
+        payload = json.dumps(data.json()).encode("utf-8")
+    payload = compress_payload(payload, compression, zstd_dict)
+
     client = storage.Client()
-    bucket = client.get_bucket(bucket_name)
+    bucket = client.bucket(bucket_name)
     blob = bucket.blob(object_name)
-    blob.upload_from_string(json.dumps(data.json()), content_type="application/json")
+    if metadata:
+        blob.metadata = metadata
+    blob.upload_from_string(payload, content_type=_COMPRESSION_CONTENT_TYPES[compression], if_generation_match=if_generation_match)
+
+    with _GCS_UPLOAD_BYTE_COUNTS_LOCK:
+        _GCS_UPLOAD_BYTE_COUNTS["objects"] += 1
+        _GCS_UPLOAD_BYTE_COUNTS["bytes_in"] += len(body)
+        _GCS_UPLOAD_BYTE_COUNTS["bytes_out"] += len(payload)
+
     if logger:
         log_printer(f'Success | Uploaded {object_name} to GCS bucket: {bucket_name}', logger)
 
 
-def list_files_in_gcs(bucket_name, logger=None):
+def list_files_in_gcs(bucket_name, logger=None, prefix=None, match_glob=None):
     """
-    List all files in a GCS bucket.
+    List files in a GCS bucket, optionally scoped by prefix or glob.
+
+    Only object names are requested from the API, so each page is a fraction
+    of the size of a full object listing.
 
     Args:
         bucket_name: Name of the GCS bucket
         logger: Optional Cloud Logging logger instance
+        prefix: Optional object name prefix to scope the listing to
+        match_glob: Optional glob pattern evaluated server-side (e.g. "player/*/games/2025/04")
 
     Returns:
         List of file names in the bucket
     """
     client = storage.Client()
     bucket = client.bucket(bucket_name)
-    blobs = bucket.list_blobs()
+    blobs = bucket.list_blobs(prefix=prefix, match_glob=match_glob, fields="items(name),nextPageToken")
     file_list = [blob.name for blob in blobs]
     if logger:
-        log_printer(f'Listing Files in GCS bucket: {bucket_name}', logger)
+        scope = " | ".join(f"{key}: {value}" for key, value in (("prefix", prefix), ("glob", match_glob)) if value)
+        log_printer(f'Listing Files in GCS bucket: {bucket_name}{" | " + scope if scope else ""} | {len(file_list)} objects', logger)
     return file_list
 
 
-def download_content_from_gcs(gcs_filename, bucket_name, logger=None):
+def list_files_in_gcs_globs(bucket_name, match_globs, logger=None, max_workers=8):
+    """
+    List files matching several globs in parallel.
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        match_globs: List of glob patterns, each listed in its own request stream
+        logger: Optional Cloud Logging logger instance
+        max_workers: Maximum number of concurrent listings
+
+    Returns:
+        Dictionary mapping each glob to its list of file names
+    """
+    if len(match_globs) == 0:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(match_globs))) as executor:
+        listings = executor.map(lambda match_glob: list_files_in_gcs(bucket_name, logger, match_glob=match_glob), match_globs)
+        return dict(zip(match_globs, listings))
+
+
+def read_gcs_manifest(bucket_name, manifest_name, logger=None):
+    """
+    Read a gzip-compressed newline-delimited manifest object from GCS.
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        manifest_name: Name of the manifest object
+        logger: Optional Cloud Logging logger instance
+
+    Returns:
+        Set of manifest entries, or None if the manifest does not exist yet
+    """
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    try:
+        payload = bucket.blob(manifest_name).download_as_bytes()
+    except NotFound:
+        return None
+
+    entries = set(decompress_payload(payload).decode("utf-8").splitlines())
+    if logger:
+        log_printer(f"Read {len(entries)} entries from manifest {manifest_name}", logger)
+    return entries
+
+
+def update_gcs_manifest(bucket_name, manifest_name, new_entries, logger=None, max_attempts=5):
+    """
+    Merge entries into a manifest object using a generation-match precondition.
+
+    The manifest is re-read and the merge retried if another writer updated it
+    between the read and the write, so concurrent writers never drop entries.
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        manifest_name: Name of the manifest object
+        new_entries: Iterable of entries to add
+        logger: Optional Cloud Logging logger instance
+        max_attempts: Maximum number of read-merge-write attempts
+
+    Returns:
+        Set of entries in the manifest after the update
+    """
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    new_entries = set(new_entries)
+
+    for attempt in range(max_attempts):
+        blob = bucket.get_blob(manifest_name)
+        if blob is None:
+            entries, generation = set(), 0
+        else:
+            generation = blob.generation
+            entries = set(decompress_payload(blob.download_as_bytes(if_generation_match=generation)).decode("utf-8").splitlines())
+
+        merged = entries | new_entries
+        if merged == entries:
+            return entries
+
+        try:
+            bucket.blob(manifest_name).upload_from_string(
+                compress_payload("\n".join(sorted(merged)).encode("utf-8"), "gzip"),
+                content_type="application/gzip",
+                if_generation_match=generation,
+            )
+        except PreconditionFailed:
+            if logger:
+                log_printer(f"Manifest {manifest_name} changed during update - retrying ({attempt + 1}/{max_attempts})", logger, severity="WARNING")
+            continue
+
+        if logger:
+            log_printer(f"Manifest {manifest_name} updated | {len(merged) - len(entries)} new entries | {len(merged)} total", logger)
+        return merged
+
+    raise RuntimeError(f"Failed to update manifest {manifest_name} after {max_attempts} attempts")
+
+
+def append_to_gcs_object(bucket_name, object_name, payload: bytes, logger=None, content_type="application/x-ndjson"):
+    """
+    Append bytes to a GCS object without re-uploading its existing content.
+
+    The payload is uploaded as a temporary chunk and composed onto the end of the
+    target object with a generation-match precondition, so concurrent appends fail
+    loudly instead of overwriting each other.
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        object_name: Name of the object to append to (created if missing)
+        payload: Bytes to append
+        logger: Optional Cloud Logging logger instance
+        content_type: Content type of the object
+
+    Returns:
+        None
+    """
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    target = bucket.get_blob(object_name)
+
+    if target is None:
+        bucket.blob(object_name).upload_from_string(payload, content_type=content_type, if_generation_match=0)
+    else:
+        chunk = bucket.blob(f"{object_name}.append-{uuid.uuid4().hex}")
+        chunk.upload_from_string(payload, content_type=content_type)
+        try:
+            target.content_type = content_type
+            target.compose([target, chunk], if_generation_match=target.generation)
+        finally:
+            chunk.delete()
+
+    if logger:
+        log_printer(f"Appended {len(payload)} bytes to {object_name}", logger)
+
+
+def stat_gcs_object(bucket_name, object_name, include_metageneration=False):
+    """
+    Fetch the generation and custom metadata of a GCS object without downloading it.
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        object_name: Name of the object in GCS
+        include_metageneration: Also return the metageneration (for metadata-update preconditions)
+
+    Returns:
+        Tuple of (generation, metadata), or (generation, metageneration, metadata) with
+        include_metageneration. Generation is 0 (metageneration 0) and metadata None if
+        the object does not exist, matching GCS "must not exist" preconditions.
+    """
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    blob = bucket.get_blob(object_name)
+
+    if blob is None:
+        return (0, 0, None) if include_metageneration else (0, None)
+    if include_metageneration:
+        return blob.generation, blob.metageneration, blob.metadata or {}
+    return blob.generation, blob.metadata or {}
+
+
+def get_gcs_object_metadata(bucket_name, object_name, logger=None):
+    """
+    Fetch the custom metadata of a GCS object without downloading its content.
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        object_name: Name of the object in GCS
+        logger: Optional Cloud Logging logger instance
+
+    Returns:
+        Dictionary of custom metadata, or None if the object does not exist
+    """
+    _, metadata = stat_gcs_object(bucket_name, object_name)
+
+    if metadata is None and logger:
+        log_printer(f"Object {object_name} not found in GCS bucket: {bucket_name}", logger)
+    return metadata
+
+
+def update_gcs_object_metadata(bucket_name, object_name, metadata, logger=None, if_metageneration_match=None):
+    """
+    Merge custom metadata into an existing GCS object without rewriting its content.
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        object_name: Name of the object in GCS
+        metadata: Dictionary of custom metadata keys to set
+        logger: Optional Cloud Logging logger instance
+        if_metageneration_match: Optional precondition; the patch raises PreconditionFailed
+                                 if the object's metadata changed since this metageneration
+
+    Returns:
+        None
+    """
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    blob = bucket.blob(object_name)
+    blob.metadata = metadata
+    blob.patch(if_metageneration_match=if_metageneration_match)
+
+    if logger:
+        log_printer(f"Updated metadata of {object_name} in GCS bucket: {bucket_name}", logger)
+
+
+def download_content_from_gcs(gcs_filename, bucket_name, logger=None, decode=True):
     """
     Download content from a GCS object as text.
 
+    gzip and zstd (including dictionary-compressed) objects are detected from
+    their magic bytes and decompressed transparently.
+
     Args:
         gcs_filename: Name of the file in GCS
         bucket_name: Name of the GCS bucket
         logger: Optional Cloud Logging logger instance
+        decode: Decode the content as UTF-8 (False returns the decompressed bytes)
 
     Returns:
-        Content of the file as string
+        Content of the file as string (bytes when decode is False)
     """
     client = storage.Client()
     bucket = client.bucket(bucket_name)
@@ -202,8 +623,8 @@ def download_content_from_gcs(gcs_filename, bucket_name, logger=None):
 
     if logger:
         log_printer(f"Downloading from GCS: {gcs_filename}", logger)
-    content = blob.download_as_text()
-    return content
+    content = decompress_payload(blob.download_as_bytes(), bucket_name)
+    return content.decode("utf-8") if decode else content
 
 
 def delete_gcs_object(gcs_filename, bucket_name, logger=None):
@@ -334,7 +755,37 @@ def check_bigquery_table_exists(table_id: str, logger=None) -> bool:
         return False
 
 
-def append_df_to_bigquery_table(df: pd.DataFrame, table_id: str, logger=None) -> None:
+# Appends up to this many rows go through the Storage Write API instead of a load job
+STORAGE_WRITE_MAX_ROWS = 10_000
+# AppendRows requests are capped at 10 MB; record batches are split to stay well under it
+_STORAGE_WRITE_REQUEST_BYTES = 6 * 1024 * 1024
+_APPEND_BACKENDS = ("auto", "load_job", "storage_write")
+
+
+def _require_bigquery_storage():
+    """Raise ImportError if the optional google-cloud-bigquery-storage package is not installed."""
+    if bigquery_storage_v1 is None:
+        raise ImportError("The storage_write backend requires google-cloud-bigquery-storage: pip install google-cloud-bigquery-storage")
+
+
+def _select_append_backend(backend, num_rows, exactly_once):
+    """
+    Resolve the "auto" append backend.
+
+    Exactly-once appends and small batches (up to STORAGE_WRITE_MAX_ROWS, e.g. the
+    single-row writes to runs_triggered/loading_completed) use the Storage Write API
+    when it is installed; everything else uses a load job.
+    """
+    if backend not in _APPEND_BACKENDS:
+        raise ValueError(f"Unsupported append backend: {backend}")
+    if backend != "auto":
+        return backend
+    if bigquery_storage_v1 is not None and (exactly_once or num_rows <= STORAGE_WRITE_MAX_ROWS):
+        return "storage_write"
+    return "load_job"
+
+
+def append_df_to_bigquery_table(df: pd.DataFrame, table_id: str, logger=None, backend="auto", exactly_once=False) -> None:
     """
     Append a pandas DataFrame to a BigQuery table.
 
@@ -342,10 +793,17 @@ def append_df_to_bigquery_table(df: pd.DataFrame, table_id: str, logger=None) ->
         df: Pandas DataFrame to append
         table_id: Full table ID (project.dataset.table)
         logger: Optional Cloud Logging logger instance
+        backend: "load_job", "storage_write" or "auto" (Storage Write API for small
+                 or exactly-once appends, load job otherwise)
+        exactly_once: Commit through a pending write stream (all rows or none)
 
     Returns:
         None
     """
+    if _select_append_backend(backend, len(df), exactly_once) == "storage_write":
+        table = _dataframe_to_arrow_for_table(df, bigquery.Client().get_table(table_id).schema)
+        return append_rows_with_storage_write_api(table, table_id, logger, exactly_once)
+
     # Configure the query job to append results
     client = bigquery.Client()
     job_config = bigquery.LoadJobConfig(
@@ -360,7 +818,252 @@ def append_df_to_bigquery_table(df: pd.DataFrame, table_id: str, logger=None) ->
         log_printer(f"{len(df)} records appended to {table_id}", logger)
 
 
-def query_bq_to_dataframe(query: str, location: str, logger=None) -> pd.DataFrame:
+_BIGQUERY_TO_ARROW_TYPES = {
+    "STRING": pa.string(),
+    "INT64": pa.int64(),
+    "INTEGER": pa.int64(),
+    "FLOAT64": pa.float64(),
+    "FLOAT": pa.float64(),
+    "BOOL": pa.bool_(),
+    "BOOLEAN": pa.bool_(),
+    "DATE": pa.date32(),
+    "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+    "DATETIME": pa.timestamp("us"),
+    "BYTES": pa.binary(),
+    "NUMERIC": pa.decimal128(38, 9),
+}
+
+
+def _bigquery_field_to_arrow_field(schema_field) -> pa.Field:
+    """Convert one BigQuery SchemaField (recursing into RECORDs) to an Arrow field."""
+    if schema_field.field_type in ("RECORD", "STRUCT"):
+        arrow_type = pa.struct([_bigquery_field_to_arrow_field(child) for child in schema_field.fields])
+    else:
+        arrow_type = _BIGQUERY_TO_ARROW_TYPES[schema_field.field_type]
+
+    if schema_field.mode == "REPEATED":
+        return pa.field(schema_field.name, pa.list_(arrow_type), nullable=False)
+    return pa.field(schema_field.name, arrow_type, nullable=schema_field.mode != "REQUIRED")
+
+
+def bigquery_schema_to_arrow_schema(schema: List[bigquery.SchemaField]) -> pa.Schema:
+    """
+    Convert a BigQuery table schema to the equivalent Arrow schema.
+
+    RECORD fields become struct columns, REPEATED fields become lists and
+    REQUIRED fields become non-nullable.
+
+    Args:
+        schema: List of bigquery.SchemaField objects
+
+    Returns:
+        pyarrow.Schema
+    """
+    return pa.schema([_bigquery_field_to_arrow_field(schema_field) for schema_field in schema])
+
+
+def _dataframe_to_arrow_for_table(df: pd.DataFrame, table_schema) -> pa.Table:
+    """
+    Convert a DataFrame to Arrow using the destination table's types.
+
+    Like load_table_from_dataframe, only the table's fields present in the DataFrame
+    are used; columns the table does not have are rejected.
+    """
+    unknown_columns = [column for column in df.columns if column not in {field.name for field in table_schema}]
+    if unknown_columns:
+        raise ValueError(f"Columns not in the destination table schema: {unknown_columns}")
+
+    arrow_schema = bigquery_schema_to_arrow_schema([field for field in table_schema if field.name in df.columns])
+    return pa.Table.from_pandas(df[arrow_schema.names], schema=arrow_schema, preserve_index=False, safe=False)
+
+
+def _split_for_append_requests(table: pa.Table):
+    """Yield record batches small enough for one AppendRows request each."""
+    rows_per_request = max(1, int(table.num_rows * _STORAGE_WRITE_REQUEST_BYTES / max(table.nbytes, 1)))
+    for offset in range(0, table.num_rows, rows_per_request):
+        for batch in table.slice(offset, rows_per_request).combine_chunks().to_batches():
+            yield batch
+
+
+def append_rows_with_storage_write_api(table: pa.Table, table_id: str, logger=None, exactly_once=False) -> None:
+    """
+    Append an Arrow table to a BigQuery table with the Storage Write API.
+
+    No load job is started, so small appends avoid load-job latency and the daily
+    load-job quota. Without exactly_once, rows go to the table's default (committed)
+    stream. With exactly_once, rows are appended at explicit offsets to a pending
+    stream which is committed atomically once every append is acknowledged. A
+    failed run therefore commits nothing, and a retried append at the same offset
+    is not duplicated.
+
+    Args:
+        table: pyarrow.Table whose columns and types match the destination table
+        table_id: Full table ID (project.dataset.table)
+        logger: Optional Cloud Logging logger instance
+        exactly_once: Use a pending stream with offsets and an atomic commit
+
+    Returns:
+        None
+    """
+    _require_bigquery_storage()
+    project_id, dataset_id, table_name = table_id.split(".")
+    write_client = bigquery_storage_v1.BigQueryWriteClient()
+    parent = write_client.table_path(project_id, dataset_id, table_name)
+
+    if exactly_once:
+        write_stream = bigquery_storage_types.WriteStream(type_=bigquery_storage_types.WriteStream.Type.PENDING)
+        stream_name = write_client.create_write_stream(parent=parent, write_stream=write_stream).name
+    else:
+        stream_name = f"{parent}/streams/_default"
+
+    # The writer schema is sent once, with the first request on the connection
+    request_template = bigquery_storage_types.AppendRowsRequest(write_stream=stream_name)
+    request_template.arrow_rows.writer_schema.serialized_schema = table.schema.serialize().to_pybytes()
+    append_rows_stream = bigquery_storage_writer.AppendRowsStream(write_client, request_template)
+
+    try:
+        response_futures = []
+        offset = 0
+        for batch in _split_for_append_requests(table):
+            request = bigquery_storage_types.AppendRowsRequest()
+            request.arrow_rows.rows.serialized_record_batch = batch.serialize().to_pybytes()
+            if exactly_once:
+                request.offset = offset
+            response_futures.append(append_rows_stream.send(request))
+            offset += batch.num_rows
+
+        for response_future in response_futures:
+            response = response_future.result()
+            if response.row_errors:
+                raise RuntimeError(f"Storage Write API rejected rows for {table_id}: {list(response.row_errors)[:5]}")
+    finally:
+        append_rows_stream.close()
+
+    if exactly_once:
+        write_client.finalize_write_stream(name=stream_name)
+        commit_response = write_client.batch_commit_write_streams(
+            bigquery_storage_types.BatchCommitWriteStreamsRequest(parent=parent, write_streams=[stream_name])
+        )
+        if commit_response.stream_errors:
+            raise RuntimeError(f"Failed to commit write stream {stream_name}: {list(commit_response.stream_errors)}")
+
+    if logger is not None:
+        log_printer(f"{table.num_rows} records appended to {table_id} (Storage Write API, {'pending stream' if exactly_once else 'default stream'})", logger)
+
+
+def append_arrow_table_to_bigquery_table(table: pa.Table, table_id: str, logger=None, backend="auto", exactly_once=False) -> None:
+    """
+    Append an Arrow table to a BigQuery table.
+
+    With the load_job backend the table is written to Parquet in memory and loaded
+    directly, skipping the pandas conversion done by load_table_from_dataframe;
+    struct columns load as RECORD fields.
+
+    Args:
+        table: pyarrow.Table whose columns match the destination table
+        table_id: Full table ID (project.dataset.table)
+        logger: Optional Cloud Logging logger instance
+        backend: "load_job", "storage_write" or "auto" (see append_df_to_bigquery_table)
+        exactly_once: Commit through a pending write stream (all rows or none)
+
+    Returns:
+        None
+    """
+    if _select_append_backend(backend, table.num_rows, exactly_once) == "storage_write":
+        return append_rows_with_storage_write_api(table, table_id, logger, exactly_once)
+
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="snappy")
+    buffer.seek(0)
+
+    client = bigquery.Client()
+    job_config = bigquery.LoadJobConfig(
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+    )
+    job = client.load_table_from_file(buffer, table_id, job_config=job_config)
+    job.result()  # Wait for the job to complete
+
+    if logger is not None:
+        log_printer(f"{table.num_rows} records appended to {table_id}", logger)
+
+
+def _distinct_column_values(frame, column):
+    """Distinct non-null values of a DataFrame or Arrow table column."""
+    if isinstance(frame, pa.Table):
+        return pc.drop_null(pc.unique(frame[column])).to_pylist()
+    return [value for value in pd.unique(frame[column]) if pd.notna(value)]
+
+
+def merge_new_rows_into_bigquery_table(frame, table_id: str, key: str, location: str, logger=None,
+                                       partition_field: str = None, staging_expiration_minutes=60) -> int:
+    """
+    Insert the rows of a batch whose key is not yet in a BigQuery table, via a staging table MERGE.
+
+    The batch is loaded into a temporary staging table (same schema as the target,
+    expiring on its own if the run dies) and merged with WHEN NOT MATCHED THEN
+    INSERT. With partition_field (a DATE partitioning column), the target side of
+    the MERGE is restricted to the batch's partitions, so the cost scales with the
+    batch rather than with the table. This is only correct when a key always lands
+    in the same partition (e.g. game_id -> game_date).
+    The batch should already be unique on key.
+
+    Args:
+        frame: pandas DataFrame or pyarrow.Table with the target table's columns
+        table_id: Full target table ID (project.dataset.table)
+        key: Column identifying a row
+        location: BigQuery location (e.g., 'EU', 'US')
+        logger: Optional Cloud Logging logger instance
+        partition_field: Optional DATE partitioning column to restrict the MERGE to
+        staging_expiration_minutes: Expiry of the staging table
+
+    Returns:
+        Number of rows inserted into the target table
+    """
+    client = bigquery.Client()
+    target_table = client.get_table(table_id)
+
+    staging_table_id = f"{table_id}_staging_{uuid.uuid4().hex[:12]}"
+    staging_table = bigquery.Table(staging_table_id, schema=target_table.schema)
+    staging_table.expires = datetime.now(timezone.utc) + timedelta(minutes=staging_expiration_minutes)
+    client.create_table(staging_table)
+
+    try:
+        if isinstance(frame, pa.Table):
+            append_arrow_table_to_bigquery_table(frame, staging_table_id, logger, backend="load_job")
+        else:
+            append_df_to_bigquery_table(frame, staging_table_id, logger, backend="load_job")
+
+        partition_filter = ""
+        if partition_field is not None:
+            partition_dates = sorted(str(value)[:10] for value in _distinct_column_values(frame, partition_field))
+            partition_literals = ", ".join(f"DATE '{value}'" for value in partition_dates)
+            partition_filter = f" AND target.{partition_field} IN ({partition_literals})"
+
+        columns = [field.name for field in target_table.schema]
+        merge_statement = f"""
+            MERGE `{table_id}` AS target
+            USING `{staging_table_id}` AS staging
+            ON target.{key} = staging.{key}{partition_filter}
+            WHEN NOT MATCHED THEN
+              INSERT ({", ".join(columns)})
+              VALUES ({", ".join(f"staging.{column}" for column in columns)})
+        """
+        if logger:
+            log_printer(f"Merging staging table into {table_id}: {merge_statement}", logger)
+
+        merge_job = client.query(merge_statement, location=location)
+        merge_job.result()  # Wait for the job to complete
+        rows_inserted = merge_job.num_dml_affected_rows or 0
+    finally:
+        client.delete_table(staging_table_id, not_found_ok=True)
+
+    if logger:
+        log_printer(f"{rows_inserted} new records merged into {table_id} ({len(frame) - rows_inserted} already present)", logger)
+    return rows_inserted
+
+
+def query_bq_to_dataframe(query: str, location: str, logger=None, query_parameters=None) -> pd.DataFrame:
     """
     Execute a BigQuery query and return results as a pandas DataFrame.
 
@@ -368,6 +1071,7 @@ def query_bq_to_dataframe(query: str, location: str, logger=None) -> pd.DataFram
         query: SQL query string
         location: Query location (e.g., 'US', 'EU')
         logger: Optional Cloud Logging logger instance
+        query_parameters: Optional list of bigquery ScalarQueryParameter/ArrayQueryParameter
 
     Returns:
         Pandas DataFrame with query results
@@ -377,7 +1081,8 @@ def query_bq_to_dataframe(query: str, location: str, logger=None) -> pd.DataFram
         log_printer(f"Executing query: {query}", logger)
 
     # Execute the query and get the result as a pandas DataFrame
-    query_job = client.query(query, location=location)
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters) if query_parameters else None
+    query_job = client.query(query, location=location, job_config=job_config)
 
     # Log job status information
     job_id = query_job.job_id
@@ -0,0 +1,129 @@
+"""
+Benchmark storage codecs for raw player game archives.
+
+Downloads a random sample of player/{user}/games/{YYYY/MM} archives from GCS, spread
+across players (at most one archive per player until every player has one), trains a
+zstd dictionary on the individual game records of half of them and reports the
+compression ratio plus compress/decode throughput of every codec on the other half.
+Optionally uploads the trained dictionary so ingestion can reference it by ID.
+"""
+
+import json
+import time
+import random
+import argparse
+
+from gcp_common import (
+    list_files_in_gcs,
+    download_content_from_gcs,
+    compress_payload,
+    decompress_payload,
+    train_zstd_dictionary,
+    upload_zstd_dictionary,
+)
+
+
+def benchmark_codec(payloads, compression, zstd_dict=None):
+    """
+    Compress and decompress every payload with one codec and time both directions.
+
+    Args:
+        payloads: List of uncompressed archive payloads as bytes
+        compression: None, "gzip" or "zstd"
+        zstd_dict: Optional trained zstd dictionary
+
+    Returns:
+        Dictionary with ratio and compress/decode throughput in MB/s
+    """
+    raw_bytes = sum(len(payload) for payload in payloads)
+
+    start = time.perf_counter()
+    compressed = [compress_payload(payload, compression, zstd_dict) for payload in payloads]
+    compress_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for blob in compressed:
+        decompress_payload(blob, zstd_dict=zstd_dict)
+    decode_seconds = time.perf_counter() - start
+
+    compressed_bytes = sum(len(blob) for blob in compressed)
+    return {
+        "ratio": raw_bytes / compressed_bytes,
+        "compress_mb_s": raw_bytes / 1e6 / max(compress_seconds, 1e-9),
+        "decode_mb_s": raw_bytes / 1e6 / max(decode_seconds, 1e-9),
+        "compressed_bytes": compressed_bytes,
+    }
+
+
+def sample_archives_across_players(archive_endpoints, sample_size, rng):
+    """
+    Randomly pick archives round-robin over shuffled players, so no single player dominates the sample.
+
+    Args:
+        archive_endpoints: List of endpoints "player/{user}/games/{YYYY}/{MM}"
+        sample_size: Number of archives to pick
+        rng: random.Random instance
+
+    Returns:
+        List of sampled endpoints
+    """
+    archives_by_player = {}
+    for endpoint in archive_endpoints:
+        archives_by_player.setdefault(endpoint.split("/")[1], []).append(endpoint)
+    for archives in archives_by_player.values():
+        rng.shuffle(archives)
+    players = list(archives_by_player)
+    rng.shuffle(players)
+
+    sample = []
+    while players and len(sample) < sample_size:
+        for player in players:
+            if len(sample) == sample_size:
+                break
+            sample.append(archives_by_player[player].pop())
+        players = [player for player in players if archives_by_player[player]]
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bucket-name", default="chess-api")
+    parser.add_argument("--sample-size", type=int, default=40, help="Number of archives to sample")
+    parser.add_argument("--dict-size", type=int, default=112640, help="Target zstd dictionary size in bytes")
+    parser.add_argument("--upload-dictionary", action="store_true", help="Store the trained dictionary in GCS")
+    parser.add_argument("--seed", type=int, help="Random seed for a reproducible sample")
+    args = parser.parse_args()
+
+    # Full monthly archives only - the glob excludes .../increments/... segments
+    archive_endpoints = list_files_in_gcs(args.bucket_name, match_glob="player/*/games/*/*")
+    archive_endpoints = sample_archives_across_players(archive_endpoints, args.sample_size, random.Random(args.seed))
+    payloads = [download_content_from_gcs(endpoint, args.bucket_name).encode("utf-8") for endpoint in archive_endpoints]
+
+    # Train on individual game records of one half, evaluate on the other half
+    training_payloads = payloads[: len(payloads) // 2]
+    evaluation_payloads = payloads[len(payloads) // 2:]
+    samples = [
+        json.dumps(game).encode("utf-8")
+        for payload in training_payloads
+        for game in json.loads(payload).get("games", [])
+    ]
+    zstd_dict = train_zstd_dictionary(samples, args.dict_size)
+
+    raw_bytes = sum(len(payload) for payload in evaluation_payloads)
+    print(f"Evaluating {len(evaluation_payloads)} archives ({raw_bytes / 1e6:.2f} MB) | zstd dictionary ID: {zstd_dict.dict_id()}")
+    print(f"{'codec':<12} {'ratio':>8} {'compress MB/s':>15} {'decode MB/s':>13} {'stored MB':>11}")
+    for name, compression, codec_dict in [
+        ("json", None, None),
+        ("gzip", "gzip", None),
+        ("zstd", "zstd", None),
+        ("zstd+dict", "zstd", zstd_dict),
+    ]:
+        result = benchmark_codec(evaluation_payloads, compression, codec_dict)
+        print(f"{name:<12} {result['ratio']:>8.2f} {result['compress_mb_s']:>15.1f} {result['decode_mb_s']:>13.1f} {result['compressed_bytes'] / 1e6:>11.2f}")
+
+    if args.upload_dictionary:
+        upload_zstd_dictionary(args.bucket_name, zstd_dict)
+
+
+if __name__ == "__main__":
+    main()
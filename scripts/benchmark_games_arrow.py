@@ -0,0 +1,108 @@
+"""
+Benchmark the Arrow-native archive transform against the pandas path.
+
+Each path goes from archive bytes to the Parquet payload that is loaded into
+BigQuery: the pandas path runs parse_games_content and converts the DataFrame
+to Arrow (what load_table_from_dataframe does), the Arrow path runs
+parse_games_arrow_table. Every run happens in a fresh process so peak RSS is
+measured per path.
+"""
+
+import io
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+
+from gcp_common import bigquery_schema_to_arrow_schema
+from chess_transform import parse_games_content, parse_games_arrow_table
+from benchmark_games_dataframe import synthetic_archive_games
+
+GCS_FILENAME = "player/benchmark/games/2025/04"
+
+
+def player_record(name):
+    return bigquery.SchemaField(name, "RECORD", "REQUIRED", fields=[
+        bigquery.SchemaField("uuid", "STRING", "REQUIRED"),
+        bigquery.SchemaField("username", "STRING", "REQUIRED"),
+        bigquery.SchemaField("rating", "INT64", "REQUIRED"),
+        bigquery.SchemaField("result", "STRING", "REQUIRED"),
+    ])
+
+
+# Same shape as schema_games in bigquery_chess_transform_load.py
+SCHEMA_GAMES = [
+    bigquery.SchemaField("game_id", "INT64", "REQUIRED"),
+    bigquery.SchemaField("url", "STRING", "REQUIRED"),
+    bigquery.SchemaField("game_date", "DATE", "REQUIRED"),
+    bigquery.SchemaField("ingested_dt", "TIMESTAMP", "REQUIRED"),
+    bigquery.SchemaField("time_control", "STRING", "REQUIRED"),
+    bigquery.SchemaField("end_time", "INTEGER", "REQUIRED"),
+    bigquery.SchemaField("rated", "BOOL", "REQUIRED"),
+    bigquery.SchemaField("time_class", "STRING", "REQUIRED"),
+    bigquery.SchemaField("rules", "STRING", "REQUIRED"),
+    player_record("white"),
+    player_record("black"),
+    bigquery.SchemaField("accuracies", "RECORD", "NULLABLE", fields=[
+        bigquery.SchemaField("white", "FLOAT64", "NULLABLE"),
+        bigquery.SchemaField("black", "FLOAT64", "NULLABLE"),
+    ]),
+    bigquery.SchemaField("eco", "STRING", "REQUIRED"),
+    bigquery.SchemaField("opening", "STRING", "REQUIRED"),
+]
+
+
+def run_path(engine, archive_path):
+    """Transform one archive file with the given engine; print elapsed seconds and peak RSS (MB) as JSON."""
+    with open(archive_path, "rb") as f:
+        content = f.read()
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if engine == "pandas":
+        df, _ = parse_games_content(GCS_FILENAME, content.decode("utf-8"))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    else:
+        table, _ = parse_games_arrow_table(GCS_FILENAME, content, bigquery_schema_to_arrow_schema(SCHEMA_GAMES))
+    pq.write_table(table, io.BytesIO())
+    elapsed = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": (peak_rss - baseline_rss) / 1024, "rows": table.num_rows}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=50_000, help="Number of games in the synthetic archive")
+    parser.add_argument("--archive", default="/tmp/benchmark_archive.json", help="Where to write the synthetic archive")
+    parser.add_argument("--run", choices=["pandas", "arrow"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        return run_path(args.run, args.archive)
+
+    with open(args.archive, "w") as f:
+        json.dump({"games": synthetic_archive_games(args.games)}, f, separators=(",", ":"))
+
+    results = {}
+    for engine in ("pandas", "arrow"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--run", engine, "--archive", args.archive],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[engine] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Games: {args.games}")
+    for engine, result in results.items():
+        print(f"{engine:<7} {result['seconds'] * 1000:>9.1f} ms  peak RSS +{result['peak_rss_mb']:>7.1f} MB")
+    print(f"Speed-up: {results['pandas']['seconds'] / results['arrow']['seconds']:.1f}x | "
+          f"Memory: {results['pandas']['peak_rss_mb'] / max(results['arrow']['peak_rss_mb'], 1):.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
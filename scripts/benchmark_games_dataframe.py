@@ -0,0 +1,123 @@
+"""
+Benchmark the vectorised games transform against the previous row-wise implementation.
+
+Builds a synthetic monthly archive (mixing games with and without "eco", "pgn" and
+"accuracies", like real archives), runs both transforms on it, checks that the
+outputs are identical (apart from the ingestion timestamp) and reports the timings.
+"""
+
+import re
+import time
+import random
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from chess_transform import transform_games_dataframe, GAMES_DATAFRAME_COLUMNS
+
+
+def synthetic_archive_games(game_count, seed=0):
+    """
+    Synthetic archive games shaped like the Chess.com API output.
+
+    Args:
+        game_count: Number of games to generate
+        seed: Random seed
+
+    Returns:
+        List of game dictionaries
+    """
+    rng = random.Random(seed)
+    games = []
+    for _ in range(game_count):
+        game_id = rng.randrange(10**10, 10**11)
+        opening = rng.choice(["Sicilian-Defense-Najdorf", "Queens-Gambit-Declined", "Kings-Indian-Defense", "Caro-Kann-Defense"])
+        game = {
+            "url": f"https://www.chess.com/game/live/{game_id}",
+            "time_control": rng.choice(["60", "180", "600"]),
+            "end_time": rng.randrange(1_700_000_000, 1_760_000_000),
+            "rated": rng.random() < 0.9,
+            "time_class": rng.choice(["bullet", "blitz", "rapid"]),
+            "rules": "chess",
+            "white": {"rating": rng.randrange(2400, 3300), "result": "win", "username": f"white{game_id % 997}", "uuid": f"w{game_id}"},
+            "black": {"rating": rng.randrange(2400, 3300), "result": "resigned", "username": f"black{game_id % 991}", "uuid": f"b{game_id}"},
+        }
+        variant = rng.random()
+        if variant < 0.6:
+            game["eco"] = f"https://www.chess.com/openings/{opening}"
+        if variant < 0.9:
+            game["pgn"] = f'[Event "Live Chess"]\n[ECOUrl "https://www.chess.com/openings/{opening}"]\n[TimeControl "180"]\n\n1. e4 c5 *'
+        elif variant < 0.95:
+            game["pgn"] = '[Event "Live Chess"]\n\n1. d4 d5 *'
+        if rng.random() < 0.7:
+            game["accuracies"] = {"white": round(rng.uniform(60, 99), 2), "black": round(rng.uniform(60, 99), 2)}
+        games.append(game)
+    return games
+
+
+def rowwise_games_dataframe(df):
+    """Previous row-wise implementation of the games transform, kept as the reference."""
+
+    def extract_last_url_component(url):
+        return url.split("/")[-1]
+
+    def extract_eco_url_from_pgn(pgn):
+        match = re.search(r'\[ECOUrl\s+"([^"]+)"\]', pgn)
+        return match.group(1) if match else "ECO Not Found"
+
+    if "accuracies" not in df.columns:
+        df["accuracies"] = dict()
+    if "eco" not in df.columns:
+        df["eco"] = np.nan
+    if "pgn" not in df.columns:
+        df["pgn"] = np.nan
+
+    df["eco"] = df.apply(
+        lambda row: row["eco"] if pd.notna(row["eco"]) else (
+            extract_eco_url_from_pgn(row["pgn"]) if pd.notna(row["pgn"]) else "ECO Not Found"
+        ),
+        axis=1
+    )
+    df["opening"] = df["eco"].apply(
+        lambda x: extract_last_url_component(x).replace("-", " ") if pd.notna(x) else "ECO Not Found"
+    )
+    df["game_id"] = df["url"].apply(lambda x: extract_last_url_component(x))
+    df["game_date"] = pd.to_datetime(df["end_time"], unit="s").dt.strftime('%Y-%m-%d')
+    df["game_date"] = pd.to_datetime(df["game_date"]).dt.date
+    df["ingested_dt"] = pd.to_datetime(datetime.now())
+    df["game_id"] = df["game_id"].astype(int)
+    return df[GAMES_DATAFRAME_COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=100_000, help="Number of games in the synthetic archive")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per implementation (best is reported)")
+    args = parser.parse_args()
+
+    games = synthetic_archive_games(args.games)
+    timings = {}
+    outputs = {}
+    for name, transform in [("row-wise", rowwise_games_dataframe), ("vectorised", lambda df: transform_games_dataframe(df, None))]:
+        best = float("inf")
+        for _ in range(args.repeats):
+            df = pd.DataFrame(games)
+            start = time.perf_counter()
+            outputs[name] = transform(df)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    pd.testing.assert_frame_equal(
+        outputs["row-wise"].drop(columns="ingested_dt"),
+        outputs["vectorised"].drop(columns="ingested_dt"),
+    )
+
+    print(f"Games: {args.games} | Outputs identical (excluding ingested_dt)")
+    for name, seconds in timings.items():
+        print(f"{name:<11} {seconds * 1000:>9.1f} ms  {args.games / seconds:>12,.0f} games/s")
+    print(f"Speed-up: {timings['row-wise'] / timings['vectorised']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
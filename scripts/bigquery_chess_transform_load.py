@@ -16,6 +16,7 @@ def _():
     import pandas as pd
     import marimo as mo
     from typing import List
+    from functools import partial
 
     # Warning Suppression
     import warnings
@@ -31,6 +32,7 @@ def _():
     from gcp_common import log_printer
     from gcp_common import initialise_cloud_logger
     from gcp_common import list_files_in_gcs
+    from gcp_common import list_files_in_gcs_globs
     from gcp_common import download_content_from_gcs
     from gcp_common import delete_gcs_object
     from gcp_common import check_bigquery_dataset_exists
@@ -38,6 +40,7 @@ def _():
     from gcp_common import create_bigquery_dataset
     from gcp_common import create_bigquery_table
     from gcp_common import append_df_to_bigquery_table
+    from gcp_common import bigquery_schema_to_arrow_schema
     from gcp_common import query_bq_to_dataframe
     from gcp_common import read_cloud_scheduler_message
 
@@ -50,15 +53,20 @@ def _():
     from chess_transform import convert_unix_ts_to_date
     from chess_transform import return_missing_data_list
     from chess_transform import generate_games_dataframe
+    from chess_transform import generate_games_dataframes_parallel
+    from chess_transform import parse_games_arrow_table
+    from chess_transform import GamesBatchLoader
     from chess_transform import compare_sets_and_return_non_matches
     from chess_transform import deletion_interaction_list_handler
     return (
         CloudLoggingHandler,
+        GamesBatchLoader,
         List,
         NotFound,
         append_df_to_bigquery_table,
         append_to_trigger_bq_dataset,
         bigquery,
+        bigquery_schema_to_arrow_schema,
         check_bigquery_dataset_exists,
         check_bigquery_table_exists,
         cloud_logging,
@@ -72,15 +80,19 @@ def _():
         download_content_from_gcs,
         extract_last_url_component,
         generate_games_dataframe,
+        generate_games_dataframes_parallel,
         initialise_cloud_logger,
         json,
         list_files_in_gcs,
+        list_files_in_gcs_globs,
         load_alerts_environmental_config,
         log_printer,
         mo,
         np,
         os,
         pandas_gbq,
+        parse_games_arrow_table,
+        partial,
         pd,
         pyarrow,
         query_bq_to_dataframe,
@@ -122,7 +134,14 @@ def _(
             "project_id": "checkmate-453316",
             "bucket_name": "chess-api",
             "dataset_name": "chess_raw",
-            "location": "EU"
+            "location": "EU",
+            "download_workers": 8,
+            "parse_workers": None,
+            "transform_engine": "arrow",
+            "batch_max_rows": 250000,
+            "batch_max_bytes": 536870912,
+            "bq_append_backend": "auto",
+            "games_dedup_mode": "merge"
         }
         config_source = "Local Config"
 
@@ -133,6 +152,7 @@ def _(
     dev_testcase    = bq_load_settings["dev_testcase"]             # Singular endpoint testing
     dataset_name    = bq_load_settings["dataset_name"]
     location        = bq_load_settings["location"]
+    transform_engine = bq_load_settings.get("transform_engine", "pandas")  # pandas/arrow
 
     dataset_id = f"{bq_load_settings['project_id']}.{dataset_name}"
 
@@ -170,6 +190,7 @@ def _(
         location,
         logger,
         test_volume,
+        transform_engine,
     )
 
 
@@ -219,6 +240,7 @@ def _(
 @app.cell
 def _(
     bigquery,
+    bigquery_schema_to_arrow_schema,
     bq_load_settings,
     check_bigquery_table_exists,
     create_bigquery_table,
@@ -263,115 +285,125 @@ def _(
     ]
     games_time_partitioning_field ="game_date"
 
+    # Arrow equivalent of the games schema (struct columns for the RECORD fields) for the arrow transform engine
+    games_arrow_schema = bigquery_schema_to_arrow_schema(schema_games)
+
     if check_bigquery_table_exists(table_id_games, logger) == False:
         create_bigquery_table(table_id_games, schema_games, logger, games_time_partitioning_field)
-    return games_time_partitioning_field, schema_games, table_id_games
+    return (
+        games_arrow_schema,
+        games_time_partitioning_field,
+        schema_games,
+        table_id_games,
+    )
 
 
 @app.cell
-def _(bq_load_settings, date_endpoint, list_files_in_gcs, logger):
-    # List player objects from GCS
-    files_in_gcs = list_files_in_gcs(bq_load_settings["bucket_name"], logger)
-    list_player_endpoints = sorted([obj for obj in files_in_gcs if obj.startswith("player/")])
-    list_filtered_game_endpoints = sorted([obj for obj in list_player_endpoints if obj.endswith(f"{date_endpoint}")])
-    return files_in_gcs, list_filtered_game_endpoints, list_player_endpoints
+def _(bq_load_settings, date_endpoint, list_files_in_gcs_globs, logger):
+    # List player objects and their incremental refresh segments for the selected month (name-only listings scoped server-side)
+    game_endpoint_listings = list_files_in_gcs_globs(
+        bq_load_settings["bucket_name"],
+        [f"player/*/games/{date_endpoint}", f"player/*/games/{date_endpoint}/increments/*"],
+        logger
+    )
+    list_filtered_game_endpoints = sorted(endpoint for listing in game_endpoint_listings.values() for endpoint in listing)
+    return game_endpoint_listings, list_filtered_game_endpoints
 
 
 @app.cell
 def _(
+    date_endpoint,
     list_filtered_game_endpoints,
     location,
     logger,
     return_missing_data_list,
     table_id_loading_completed,
 ):
-    # Determine which endpoints that have not been processed from GCS to BQ destination
-    endpoints_missing_from_bq = sorted(return_missing_data_list("gcs_endpoint", table_id_loading_completed, list_filtered_game_endpoints, location, logger))
+    # Determine which endpoints that have not been processed from GCS to BQ destination (only the selected month's partition is scanned)
+    game_month = date_endpoint.replace("/", "-") + "-01"
+    endpoints_missing_from_bq = sorted(return_missing_data_list(
+        "gcs_endpoint",
+        table_id_loading_completed,
+        list_filtered_game_endpoints,
+        location,
+        logger,
+        partition_range=("gcs_game_month", game_month, game_month)
+    ))
     # endpoints_missing_from_bq
-    return (endpoints_missing_from_bq,)
+    return endpoints_missing_from_bq, game_month
 
 
 @app.cell
 def _(
+    GamesBatchLoader,
     app_env,
     bq_load_settings,
     dev_testcase,
     endpoints_missing_from_bq,
-    generate_games_dataframe,
-    log_printer,
+    games_arrow_schema,
+    generate_games_dataframes_parallel,
+    location,
     logger,
-    pd,
+    parse_games_arrow_table,
+    partial,
+    table_id_games,
+    table_id_loading_completed,
     test_volume,
+    transform_engine,
 ):
+    # Endpoints to transform: the single test case in DEV, a limited volume in TEST, everything missing in PROD
     if app_env == "DEV":
-        df_combined, interaction_dict = generate_games_dataframe(dev_testcase, bq_load_settings["bucket_name"], logger)
-        df_interaction_list = pd.DataFrame([interaction_dict])
-        print("Downloaded test case to dataframe")
-
-    # Download game data from each endpoint in GCS and store dataframes into list
-    if app_env in ("PROD", "TEST"):
-        list_of_game_dfs = []
-        list_of_interaction_dicts = []
-        for i, gcs_filename in enumerate(endpoints_missing_from_bq):
+        endpoints_to_transform = [dev_testcase]
+    elif app_env == "TEST":
+        endpoints_to_transform = endpoints_missing_from_bq[:test_volume]
+    else:
+        endpoints_to_transform = endpoints_missing_from_bq
 
-            # When in test setting, this will apply a limiter to the volume of data being
-            if app_env == "TEST" and i == test_volume:
-                break
+    # The arrow engine parses archive bytes straight into Arrow tables typed by schema_games
+    if transform_engine == "arrow":
+        parse_options = {"parse_function": partial(parse_games_arrow_table, arrow_schema=games_arrow_schema), "decode": False}
+    else:
+        parse_options = {}
 
-            df, interaction_dict = generate_games_dataframe(gcs_filename, bq_load_settings["bucket_name"], logger)
+    # Games are flushed to BigQuery in bounded batches together with their loading_completed records (only PROD writes)
+    batch_loader = GamesBatchLoader(
+        table_id_games,
+        table_id_loading_completed,
+        bq_load_settings["bucket_name"],
+        location,
+        logger,
+        max_rows=bq_load_settings.get("batch_max_rows", 250_000),
+        max_bytes=bq_load_settings.get("batch_max_bytes", 512 * 1024 * 1024),
+        dry_run=app_env != "PROD",
+        append_backend=bq_load_settings.get("bq_append_backend", "auto"),
+        dedup_mode=bq_load_settings.get("games_dedup_mode", "query"),
+    )
 
-            list_of_interaction_dicts.append(interaction_dict)
+    # Downloads (threads) are pipelined into parsing (processes); results come back in endpoint order
+    for gcs_filename, df, interaction_dict in generate_games_dataframes_parallel(
+        endpoints_to_transform,
+        bq_load_settings["bucket_name"],
+        logger,
+        download_workers=bq_load_settings.get("download_workers", 8),
+        parse_workers=bq_load_settings.get("parse_workers"),
+        **parse_options,
+    ):
+        batch_loader.add(df, interaction_dict)
 
-            if df is not None:
-                list_of_game_dfs.append(df)
+    batch_loader.close()
 
-        df_combined = pd.concat(list_of_game_dfs)
-        df_interaction_list = pd.DataFrame(list_of_interaction_dicts)
-        log_printer("Transformed all downloads into list of dataframes and concatenated together", logger)
+    # Last flushed batch, kept for inspection
+    df_deduplicated = batch_loader.last_batch
+    df_interaction_list = batch_loader.last_interaction_list
     return (
+        batch_loader,
         df,
-        df_combined,
+        df_deduplicated,
         df_interaction_list,
+        endpoints_to_transform,
         gcs_filename,
-        i,
         interaction_dict,
-        list_of_game_dfs,
-        list_of_interaction_dicts,
-    )
-
-
-@app.cell
-def _(df_combined):
-    df_combined
-    return
-
-
-@app.cell
-def _(
-    df_combined,
-    location,
-    log_printer,
-    logger,
-    return_missing_data_list,
-    table_id_games,
-):
-    # Determine missing game_id's from BigQuery and filter list accordingly
-    games_missing_from_bq = return_missing_data_list("game_id", table_id_games, df_combined["game_id"], location, logger)
-    df_filtered = df_combined[df_combined["game_id"].isin(games_missing_from_bq)]
-    games_filtered_away = len(df_combined) - len(df_filtered)
-    print("\n")
-    log_printer(f"Number of game_id's filtered away from combined dataframe: {games_filtered_away}", logger)
-
-    # De-duplication process for game_id's in scenarios where where players inside batch play each other
-    df_deduplicated = df_filtered.drop_duplicates(subset="game_id", keep="first")
-    duplicates_removed = len(df_filtered) - len(df_deduplicated)
-    log_printer(f"Number of duplicate game_id's removed from combined dataframe: {duplicates_removed}", logger)
-    return (
-        df_deduplicated,
-        df_filtered,
-        duplicates_removed,
-        games_filtered_away,
-        games_missing_from_bq,
+        parse_options,
     )
 
 
@@ -387,24 +419,5 @@ def _(df_interaction_list):
     return
 
 
-@app.cell
-def _(
-    app_env,
-    append_df_to_bigquery_table,
-    bq_load_settings,
-    deletion_interaction_list_handler,
-    df_deduplicated,
-    df_interaction_list,
-    logger,
-    table_id_games,
-    table_id_loading_completed,
-):
-    if app_env == "PROD":
-        deletion_interaction_list_handler(df_interaction_list, bq_load_settings["bucket_name"], logger)
-        append_df_to_bigquery_table(df_deduplicated, table_id_games)
-        append_df_to_bigquery_table(df_interaction_list, table_id_loading_completed)
-    return
-
-
 if __name__ == "__main__":
     app.run()
@@ -0,0 +1,280 @@
+"""
+Local stand-in for the Chess.com public API, with record/replay and an ingestion benchmark.
+
+Subcommands:
+    serve      Serve leaderboards, profiles, stats, archive lists and monthly archives
+               on localhost. Responses are synthetic (deterministic per URL) or replayed
+               from a recording, with configurable latency and 429/404/5xx injection.
+    record     Capture real API responses for the top leaderboard players to disk once.
+    benchmark  Run request_from_list_and_upload_to_gcs end to end against a base URL and
+               report requests/sec, p50/p99 latency and retry counts.
+
+The ingestion code reads its API base URL from CHESS_API_BASE_URL, so a full ingestion
+run can also be pointed at the stand-in, e.g.
+    CHESS_API_BASE_URL=http://localhost:8765/pub uv run python scripts/gcs_chess_ingestion.py
+Pair it with STORAGE_EMULATOR_HOST (fake-gcs-server) to keep GCS local too.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+from pathlib import Path
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+LEADERBOARD_FORMATS = ["daily", "live_rapid", "live_blitz", "live_bullet"]
+TIME_CLASSES = {"daily": ("86400", "daily"), "live_rapid": ("600", "rapid"), "live_blitz": ("180", "blitz"), "live_bullet": ("60", "bullet")}
+
+
+class ConsoleLogger:
+    """Stand-in for the Cloud Logging logger - log_printer already echoes every message to the console."""
+
+    def log_text(self, msg, severity="INFO"):
+        pass
+
+
+def synthetic_username(index):
+    """Deterministic leaderboard username for the synthetic player at this index."""
+    return f"standin_player_{index:05d}"
+
+
+def synthetic_periods(months):
+    """Most recent completed months, oldest first, as "YYYY/MM" strings."""
+    first_month = date.today().replace(day=1)
+    return [(first_month - relativedelta(months=offset)).strftime("%Y/%m") for offset in range(months, 0, -1)]
+
+
+def synthetic_games(base_url, player, period, games_per_archive, opponents):
+    """Deterministic archive of games for one player/month, shaped like the real API."""
+    rng = random.Random(f"{player}/{period}")
+    year, month = (int(part) for part in period.split("/"))
+    month_start = int(time.mktime(date(year, month, 1).timetuple()))
+    games = []
+    for _ in range(games_per_archive):
+        game_id = rng.randrange(10**10, 10**11)
+        form = rng.choice(LEADERBOARD_FORMATS)
+        opponent = synthetic_username(rng.randrange(opponents))
+        white, black = (player, opponent) if rng.random() < 0.5 else (opponent, player)
+        result = rng.choice(["win", "checkmated", "resigned", "timeout", "agreed", "stalemate"])
+        games.append({
+            "url": f"https://www.chess.com/game/live/{game_id}",
+            "pgn": f'[Event "Live Chess"]\n[Site "Chess.com"]\n[ECOUrl "https://www.chess.com/openings/Sicilian-Defense-{game_id % 7}"]\n\n1. e4 c5 *',
+            "time_control": TIME_CLASSES[form][0],
+            "end_time": month_start + rng.randrange(0, 27 * 86400),
+            "rated": rng.random() < 0.9,
+            "accuracies": {"white": round(rng.uniform(60, 99), 2), "black": round(rng.uniform(60, 99), 2)},
+            "tcn": "mC0Kgv5Qbs",
+            "uuid": hashlib.md5(str(game_id).encode()).hexdigest(),
+            "initial_setup": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "fen": "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2",
+            "time_class": TIME_CLASSES[form][1],
+            "rules": "chess",
+            "white": {"rating": rng.randrange(2400, 3300), "result": result if white == player else "win", "@id": f"{base_url}/player/{white}", "username": white, "uuid": hashlib.md5(white.encode()).hexdigest()},
+            "black": {"rating": rng.randrange(2400, 3300), "result": "win" if white == player else result, "@id": f"{base_url}/player/{black}", "username": black, "uuid": hashlib.md5(black.encode()).hexdigest()},
+            "eco": f"https://www.chess.com/openings/Sicilian-Defense-{game_id % 7}",
+        })
+    games.sort(key=lambda game: game["end_time"])
+    return {"games": games}
+
+
+def synthetic_response(path, base_url, args):
+    """Build the JSON body for an API path, or None if the path is unknown."""
+    parts = path.strip("/").split("/")[1:]  # drop "pub"
+    if parts == ["leaderboards"]:
+        return {
+            form: [{"username": synthetic_username(i), "rank": rank, "score": 3300 - rank}
+                   for rank, i in enumerate(range(offset, args.players, len(LEADERBOARD_FORMATS)), start=1)]
+            for offset, form in enumerate(LEADERBOARD_FORMATS)
+        }
+    if len(parts) < 2 or parts[0] != "player":
+        return None
+    player = parts[1]
+    if len(parts) == 2:
+        return {"@id": f"{base_url}/player/{player}", "username": player, "player_id": int(hashlib.md5(player.encode()).hexdigest()[:7], 16), "followers": 100, "country": f"{base_url}/country/NO", "last_online": int(time.time()), "joined": 1300000000, "status": "premium", "is_streamer": False, "verified": False, "league": "Legend"}
+    if parts[2:] == ["stats"]:
+        return {f"chess_{form.split('_')[-1]}": {"last": {"rating": 2800, "date": int(time.time()), "rd": 45}, "best": {"rating": 3000, "date": 1600000000, "game": "https://www.chess.com/game/live/1"}, "record": {"win": 500, "loss": 200, "draw": 100}} for form in LEADERBOARD_FORMATS}
+    if parts[2:] == ["games", "archives"]:
+        return {"archives": [f"{base_url}/player/{player}/games/{period}" for period in synthetic_periods(args.months)]}
+    if len(parts) == 5 and parts[2] == "games":
+        return synthetic_games(base_url, player, f"{parts[3]}/{parts[4]}", args.games_per_archive, args.players * 4)
+    return None
+
+
+def recording_path(replay_dir, path):
+    """File under replay_dir that holds the recorded response for an API path."""
+    return Path(replay_dir) / (path.strip("/") + ".json")
+
+
+class ChessApiStandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    args = None
+
+    def log_message(self, format, *log_args):
+        if self.args.verbose:
+            super().log_message(format, *log_args)
+
+    def _send(self, status_code, body=b"", headers=None):
+        self.send_response(status_code)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        args = self.args
+        path = self.path.split("?", 1)[0]
+        time.sleep(max(0.0, random.gauss(args.latency_ms, args.jitter_ms)) / 1000)
+
+        # Fault injection happens before any routing so every endpoint is affected equally
+        fault = random.random()
+        if fault < args.rate_429:
+            return self._send(429, b'{"message": "Too Many Requests"}', {"Retry-After": str(args.retry_after), "Content-Type": "application/json"})
+        if fault < args.rate_429 + args.rate_5xx:
+            return self._send(random.choice([500, 502, 503]), b'{"message": "Server Error"}', {"Content-Type": "application/json"})
+        if fault < args.rate_429 + args.rate_5xx + args.rate_404:
+            return self._send(404, b'{"message": "Not Found"}', {"Content-Type": "application/json"})
+
+        body = None
+        if args.replay_dir and recording_path(args.replay_dir, path).exists():
+            body = recording_path(args.replay_dir, path).read_bytes()
+        elif not args.replay_only:
+            payload = synthetic_response(path, f"http://{self.headers.get('Host', 'localhost')}/pub", args)
+            body = None if payload is None else json.dumps(payload).encode("utf-8")
+
+        if body is None:
+            return self._send(404, b'{"message": "Not Found"}', {"Content-Type": "application/json"})
+
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers={"ETag": etag})
+        self._send(200, body, {"Content-Type": "application/json", "ETag": etag, "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+
+def serve(args):
+    ChessApiStandinHandler.args = args
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), ChessApiStandinHandler)
+    print(f"Chess.com API stand-in listening on http://localhost:{args.port}/pub | latency {args.latency_ms}±{args.jitter_ms} ms | "
+          f"429: {args.rate_429:.1%} | 5xx: {args.rate_5xx:.1%} | 404: {args.rate_404:.1%} | replay dir: {args.replay_dir}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+def record(args):
+    from chess_ingestion import get_top_player_list, exponential_backoff_request
+
+    logger = ConsoleLogger()
+    headers = {"User-Agent": args.user_agent}
+
+    def capture(url):
+        response = exponential_backoff_request(url, headers, logger)
+        if response is None:
+            return None
+        target = recording_path(args.replay_dir, "/pub/" + url.split("/pub/", 1)[1])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(response.content)
+        return response
+
+    leaderboards_response = capture(f"{args.base_url}/leaderboards")
+    players = sorted(get_top_player_list(leaderboards_response, logger))[:args.players]
+    for player in players:
+        archives_response = capture(f"{args.base_url}/player/{player}/games/archives")
+        archive_urls = [] if archives_response is None else archives_response.json().get("archives", [])
+        for archive_url in archive_urls[-args.months:]:
+            capture(archive_url)
+    print(f"Recorded leaderboards and {len(players)} players ({args.months} months each) to {args.replay_dir}")
+
+
+def benchmark(args):
+    os.environ["CHESS_API_BASE_URL"] = args.base_url
+    from chess_ingestion import (
+        create_chess_api_session,
+        get_chess_api_rate_limiter,
+        get_request_timing_stats,
+        request_from_list_and_upload_to_gcs,
+    )
+
+    logger = ConsoleLogger()
+    rate_limiter = get_chess_api_rate_limiter()
+    rate_limiter.rate = args.initial_rate
+    rate_limiter.max_rate = args.max_rate
+    rate_limiter.burst = args.max_in_flight
+    timing_stats = get_request_timing_stats()
+    timing_stats.reset()
+
+    periods = synthetic_periods(args.months)
+    request_urls = [f"{args.base_url}/player/{synthetic_username(i)}/games/{period}" for i in range(args.players) for period in periods]
+
+    start = time.perf_counter()
+    request_from_list_and_upload_to_gcs(
+        args.bucket_name,
+        request_urls,
+        {"User-Agent": args.user_agent},
+        logger,
+        max_in_flight=args.max_in_flight,
+        session=create_chess_api_session(pool_maxsize=args.max_in_flight, http2=args.http2),
+        compression=args.compression,
+        update_manifest=False,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{'urls':>8} {'in-flight':>10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'requests':>9} {'retries':>8} {'429s':>6}")
+    print(f"{len(request_urls):>8} {args.max_in_flight:>10} {timing_stats.requests / elapsed:>8.1f} "
+          f"{1000 * timing_stats.latency_percentile(50):>8.1f} {1000 * timing_stats.latency_percentile(99):>8.1f} "
+          f"{timing_stats.requests:>9} {timing_stats.retries:>8} {rate_limiter.throttle_count:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the stand-in API server")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--players", type=int, default=500, help="Number of synthetic leaderboard players")
+    serve_parser.add_argument("--months", type=int, default=12, help="Number of archive months per synthetic player")
+    serve_parser.add_argument("--games-per-archive", type=int, default=150, help="Synthetic games per monthly archive (payload size)")
+    serve_parser.add_argument("--latency-ms", type=float, default=80.0, help="Mean response latency")
+    serve_parser.add_argument("--jitter-ms", type=float, default=30.0, help="Standard deviation of response latency")
+    serve_parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    serve_parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of requests answered with 500/502/503")
+    serve_parser.add_argument("--rate-404", type=float, default=0.0, help="Fraction of requests answered with 404")
+    serve_parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    serve_parser.add_argument("--replay-dir", help="Serve recorded responses from this directory when present")
+    serve_parser.add_argument("--replay-only", action="store_true", help="404 for paths missing from the recording instead of synthesising")
+    serve_parser.add_argument("--verbose", action="store_true", help="Log every request")
+    serve_parser.set_defaults(handler=serve)
+
+    record_parser = subparsers.add_parser("record", help="Capture real API responses to disk for replay")
+    record_parser.add_argument("--replay-dir", required=True)
+    record_parser.add_argument("--base-url", default="https://api.chess.com/pub")
+    record_parser.add_argument("--players", type=int, default=50, help="Number of leaderboard players to record")
+    record_parser.add_argument("--months", type=int, default=3, help="Most recent archive months per player")
+    record_parser.add_argument("--user-agent", default="chess_api_standin.py (Python 3.11) (username: filiplivancic; contact: filiplivancic@gmail.com)")
+    record_parser.set_defaults(handler=record)
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Run the archive ingestion end to end against a base URL")
+    benchmark_parser.add_argument("--base-url", default="http://localhost:8765/pub")
+    benchmark_parser.add_argument("--bucket-name", default="chess-api", help="Target bucket (set STORAGE_EMULATOR_HOST for fake-gcs-server)")
+    benchmark_parser.add_argument("--players", type=int, default=100)
+    benchmark_parser.add_argument("--months", type=int, default=3)
+    benchmark_parser.add_argument("--max-in-flight", type=int, default=8)
+    benchmark_parser.add_argument("--initial-rate", type=float, default=4.0, help="Starting rate limiter rate (req/s)")
+    benchmark_parser.add_argument("--max-rate", type=float, default=20.0, help="Rate limiter ceiling (req/s) - raise to measure raw throughput")
+    benchmark_parser.add_argument("--compression", choices=["gzip", "zstd"])
+    benchmark_parser.add_argument("--http2", action="store_true")
+    benchmark_parser.add_argument("--user-agent", default="chess_api_standin.py benchmark")
+    benchmark_parser.set_defaults(handler=benchmark)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
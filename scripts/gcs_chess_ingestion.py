@@ -45,7 +45,7 @@ def _(sys):
     # Importing Local Functions
     from gcp_common import initialise_cloud_logger
     from gcp_common import upload_json_to_gcs_bucket
-    from gcp_common import list_files_in_gcs
+    from gcp_common import load_zstd_dictionary
     from gcp_common import read_cloud_scheduler_message
     from gcp_common import log_printer
 
@@ -53,31 +53,55 @@ def _(sys):
     from alerts import create_bq_run_monitor_datasets
     from alerts import append_to_trigger_bq_dataset
 
+    from chess_ingestion import CHESS_API_BASE_URL
     from chess_ingestion import script_date_selection
     from chess_ingestion import generate_year_month_list
     from chess_ingestion import get_top_player_list
+    from chess_ingestion import select_player_shard
+    from chess_ingestion import record_leaderboard_snapshot
+    from chess_ingestion import generate_entrant_backfill_combinations
+    from chess_ingestion import drop_departed_players
+    from chess_ingestion import list_existing_player_endpoints
     from chess_ingestion import generate_remaining_endpoint_combinations
+    from chess_ingestion import filter_combinations_by_player_archives
     from chess_ingestion import append_player_endpoints_to_https_chess_prefix
     from chess_ingestion import exponential_backoff_request
+    from chess_ingestion import create_chess_api_session
+    from chess_ingestion import IngestionJournal
+    from chess_ingestion import ingestion_journal_name
     from chess_ingestion import request_from_list_and_upload_to_gcs
+    from chess_ingestion import request_player_profiles_and_upload_to_gcs
+    from chess_ingestion import crawl_opponent_graph
     return (
+        CHESS_API_BASE_URL,
+        IngestionJournal,
         append_player_endpoints_to_https_chess_prefix,
         append_to_trigger_bq_dataset,
         create_bq_run_monitor_datasets,
+        crawl_opponent_graph,
+        create_chess_api_session,
+        drop_departed_players,
         exponential_backoff_request,
+        filter_combinations_by_player_archives,
         folder,
         folder_list,
+        generate_entrant_backfill_combinations,
         generate_remaining_endpoint_combinations,
         generate_year_month_list,
         get_top_player_list,
+        ingestion_journal_name,
         initialise_cloud_logger,
-        list_files_in_gcs,
+        list_existing_player_endpoints,
         load_alerts_environmental_config,
+        load_zstd_dictionary,
         log_printer,
         read_cloud_scheduler_message,
+        record_leaderboard_snapshot,
         rel_path,
         request_from_list_and_upload_to_gcs,
+        request_player_profiles_and_upload_to_gcs,
         script_date_selection,
+        select_player_shard,
         upload_json_to_gcs_bucket,
     )
 
@@ -110,6 +134,21 @@ def _(
             "app_env": "DEV",
             "start_date": "2025-08-01",
             "end_date": "2025-08-01",
+            "max_in_flight_requests": 8,
+            "refresh_existing": False,
+            "incremental_refresh": False,
+            "http2": False,
+            "compression": None,
+            "zstd_dictionary_id": None,
+            "journal_checkpoint_interval": 30,
+            "entrant_backfill_months": 12,
+            "ingest_player_profiles": False,
+            "player_profile_request_budget": None,
+            "crawl_opponents": False,
+            "crawl_max_depth": 1,
+            "crawl_request_budget": 2000,
+            "shard_count": int(os.getenv("SHARD_COUNT", 1)),
+            "shard_index": int(os.getenv("SHARD_INDEX", 0)),
             "request_headers": {
                 "User-Agent": "gcs_chess_ingestion.py (Python 3.11) (username: filiplivancic; contact: filiplivancic@gmail.com)"
             }
@@ -155,8 +194,45 @@ def _(end_date, start_date):
     return
 
 
+@app.cell
+def _(create_chess_api_session, gcs_ingestion_settings):
+    # Pooled keep-alive session shared by the leaderboard and player archive requests
+    chess_api_session = create_chess_api_session(
+        pool_maxsize=gcs_ingestion_settings.get("max_in_flight_requests", 8),
+        http2=gcs_ingestion_settings.get("http2", False)
+    )
+    return (chess_api_session,)
+
+
 @app.cell
 def _(
+    IngestionJournal,
+    end_date,
+    gcs_ingestion_settings,
+    ingestion_journal_name,
+    logger,
+    start_date,
+):
+    # Progress journal - resume endpoints left unfinished by a previous run instead of re-planning
+    journal = IngestionJournal(
+        gcs_ingestion_settings["bucket_name"],
+        ingestion_journal_name(
+            start_date,
+            end_date,
+            shard_index=gcs_ingestion_settings.get("shard_index", 0),
+            shard_count=gcs_ingestion_settings.get("shard_count", 1)
+        ),
+        logger,
+        checkpoint_interval=gcs_ingestion_settings.get("journal_checkpoint_interval", 30)
+    )
+    resumed_combo_list = journal.load_pending()
+    return journal, resumed_combo_list
+
+
+@app.cell
+def _(
+    CHESS_API_BASE_URL,
+    chess_api_session,
     datetime,
     exponential_backoff_request,
     gcs_ingestion_settings,
@@ -166,60 +242,216 @@ def _(
 ):
     # Getting current leaderboard data of top chess players
     log_printer('Requesting the latest leaderboards', logger)
-    leaderboards_url = f'https://api.chess.com/pub/leaderboards'
-    leaderboards_response = exponential_backoff_request(leaderboards_url, gcs_ingestion_settings["request_headers"], logger)
+    leaderboards_url = f'{CHESS_API_BASE_URL}/leaderboards'
+    leaderboards_response = exponential_backoff_request(leaderboards_url, gcs_ingestion_settings["request_headers"], logger, session=chess_api_session)
     gcs_leaderboard_endpoint = f"leaderboards/{datetime.now().strftime('%Y-%m-%d')}/{datetime.now().strftime('%H-%M-%S')}"
-    upload_json_to_gcs_bucket(gcs_ingestion_settings["bucket_name"], gcs_leaderboard_endpoint, leaderboards_response, logger)
+
+    # Every shard reads the leaderboard to derive its partition, but only the first shard stores the snapshot
+    if gcs_ingestion_settings.get("shard_index", 0) == 0:
+        upload_json_to_gcs_bucket(gcs_ingestion_settings["bucket_name"], gcs_leaderboard_endpoint, leaderboards_response, logger, raw=True, validate=True)
     return gcs_leaderboard_endpoint, leaderboards_response, leaderboards_url
 
 
 @app.cell
-def _(gcs_ingestion_settings, list_files_in_gcs, logger):
-    # Listing the current objects with player data in the chess api storage bucket
-    all_files_in_gcs = list_files_in_gcs(gcs_ingestion_settings["bucket_name"], logger)
-    players_data_in_gcs = sorted([obj for obj in all_files_in_gcs if obj.startswith("player/")])
-    return all_files_in_gcs, players_data_in_gcs
+def _(
+    gcs_ingestion_settings,
+    gcs_leaderboard_endpoint,
+    leaderboards_response,
+    logger,
+    record_leaderboard_snapshot,
+):
+    # Compare with the previous day's leaderboard - who entered, who left and how ranks moved
+    leaderboard_delta = record_leaderboard_snapshot(
+        gcs_ingestion_settings["bucket_name"],
+        leaderboards_response,
+        gcs_leaderboard_endpoint,
+        logger,
+        persist=gcs_ingestion_settings.get("shard_index", 0) == 0
+    )
+    return (leaderboard_delta,)
 
 
 @app.cell
 def _(
-    append_player_endpoints_to_https_chess_prefix,
     end_date,
     gcs_ingestion_settings,
-    generate_remaining_endpoint_combinations,
     generate_year_month_list,
+    list_existing_player_endpoints,
+    logger,
+    resumed_combo_list,
+    start_date,
+):
+    # Player endpoints already in the chess api storage bucket for the selected months (via the endpoint manifests)
+    year_month_list = generate_year_month_list(start_date, end_date)
+    players_data_in_gcs = None
+    if resumed_combo_list is None:
+        players_data_in_gcs = list_existing_player_endpoints(gcs_ingestion_settings["bucket_name"], year_month_list, logger)
+    return players_data_in_gcs, year_month_list
+
+
+@app.cell
+def _(
+    append_player_endpoints_to_https_chess_prefix,
+    chess_api_session,
+    drop_departed_players,
+    filter_combinations_by_player_archives,
+    gcs_ingestion_settings,
+    generate_entrant_backfill_combinations,
+    generate_remaining_endpoint_combinations,
     get_top_player_list,
+    journal,
+    leaderboard_delta,
     leaderboards_response,
     logger,
     players_data_in_gcs,
+    resumed_combo_list,
+    select_player_shard,
     start_date,
+    year_month_list,
 ):
-    # Determine list of requests for players and specified period
-    year_month_list = generate_year_month_list(start_date, end_date)
-    top_player_list = get_top_player_list(leaderboards_response, logger)
-
-    # Determine remaining player/period combinations to request based on contents of GCS bucket
-    remaining_combo_list = generate_remaining_endpoint_combinations(
-        gcs_ingestion_settings["bucket_name"],
-        players_data_in_gcs,
-        top_player_list,
-        year_month_list,
-        logger
-    )
+    if resumed_combo_list is None:
+        # Determine list of requests for players and specified period
+        top_player_list = get_top_player_list(leaderboards_response, logger)
+
+        # Keep only this worker's stable hash partition of the players when running sharded
+        top_player_list = select_player_shard(
+            top_player_list,
+            gcs_ingestion_settings.get("shard_index", 0),
+            gcs_ingestion_settings.get("shard_count", 1),
+            logger
+        )
+
+        # Determine remaining player/period combinations to request based on contents of GCS bucket
+        remaining_combo_list = generate_remaining_endpoint_combinations(
+            gcs_ingestion_settings["bucket_name"],
+            players_data_in_gcs,
+            top_player_list,
+            year_month_list,
+            logger,
+            include_existing=gcs_ingestion_settings.get("refresh_existing", False) or gcs_ingestion_settings.get("incremental_refresh", False)
+        )
+
+        # Queue the earlier months for players who just entered the leaderboard
+        remaining_combo_list += generate_entrant_backfill_combinations(
+            gcs_ingestion_settings["bucket_name"],
+            sorted(set(leaderboard_delta["entered"]) & set(top_player_list)),
+            start_date,
+            gcs_ingestion_settings.get("entrant_backfill_months", 12),
+            logger
+        )
+
+        # Only request months each player actually has an archive for
+        remaining_combo_list = filter_combinations_by_player_archives(
+            gcs_ingestion_settings["bucket_name"],
+            remaining_combo_list,
+            year_month_list,
+            gcs_ingestion_settings["request_headers"],
+            logger,
+            max_in_flight=gcs_ingestion_settings.get("max_in_flight_requests", 8),
+            session=chess_api_session
+        )
+        journal.record_planned(remaining_combo_list)
+    else:
+        # Resuming an interrupted run - the journal already holds the plan, minus players who have since left
+        top_player_list = None
+        remaining_combo_list = drop_departed_players(resumed_combo_list, leaderboard_delta["left"], logger)
 
     request_urls = append_player_endpoints_to_https_chess_prefix(remaining_combo_list)
-    return remaining_combo_list, request_urls, top_player_list, year_month_list
+    return remaining_combo_list, request_urls, top_player_list
 
 
 @app.cell
 def _(
+    chess_api_session,
     gcs_ingestion_settings,
+    journal,
+    load_zstd_dictionary,
     logger,
     request_from_list_and_upload_to_gcs,
     request_urls,
 ):
+    # Optional trained zstd dictionary for compressed archive storage
+    zstd_dictionary = None
+    if gcs_ingestion_settings.get("zstd_dictionary_id"):
+        zstd_dictionary = load_zstd_dictionary(gcs_ingestion_settings["bucket_name"], gcs_ingestion_settings["zstd_dictionary_id"])
+
     # Request data from list and upload to GCS
-    request_from_list_and_upload_to_gcs(gcs_ingestion_settings["bucket_name"], request_urls, gcs_ingestion_settings["request_headers"], logger)
+    request_from_list_and_upload_to_gcs(
+        gcs_ingestion_settings["bucket_name"],
+        request_urls,
+        gcs_ingestion_settings["request_headers"],
+        logger,
+        max_in_flight=gcs_ingestion_settings.get("max_in_flight_requests", 8),
+        conditional=gcs_ingestion_settings.get("refresh_existing", False),
+        session=chess_api_session,
+        compression=gcs_ingestion_settings.get("compression"),
+        zstd_dict=zstd_dictionary,
+        journal=journal,
+        incremental=gcs_ingestion_settings.get("incremental_refresh", False)
+    )
+    journal.complete()
+    return (zstd_dictionary,)
+
+
+@app.cell
+def _(
+    chess_api_session,
+    gcs_ingestion_settings,
+    gcs_leaderboard_endpoint,
+    get_top_player_list,
+    leaderboards_response,
+    logger,
+    request_player_profiles_and_upload_to_gcs,
+    select_player_shard,
+):
+    # Player profile and stats snapshot for this shard's leaderboard players
+    if gcs_ingestion_settings.get("ingest_player_profiles", False):
+        shard_count = gcs_ingestion_settings.get("shard_count", 1)
+        shard_index = gcs_ingestion_settings.get("shard_index", 0)
+        profile_snapshot_name = gcs_leaderboard_endpoint.split("/", 1)[1] + (f"_shard-{shard_index}-of-{shard_count}" if shard_count > 1 else "")
+
+        request_player_profiles_and_upload_to_gcs(
+            gcs_ingestion_settings["bucket_name"],
+            select_player_shard(get_top_player_list(leaderboards_response, logger), shard_index, shard_count, logger),
+            profile_snapshot_name,
+            gcs_ingestion_settings["request_headers"],
+            logger,
+            max_in_flight=gcs_ingestion_settings.get("max_in_flight_requests", 8),
+            session=chess_api_session,
+            request_budget=gcs_ingestion_settings.get("player_profile_request_budget")
+        )
+    return
+
+
+@app.cell
+def _(
+    chess_api_session,
+    crawl_opponent_graph,
+    gcs_ingestion_settings,
+    get_top_player_list,
+    leaderboards_response,
+    logger,
+    select_player_shard,
+    year_month_list,
+    zstd_dictionary,
+):
+    # Optional breadth-first crawl through opponents of the leaderboard players
+    if gcs_ingestion_settings.get("crawl_opponents", False):
+        crawl_summary = crawl_opponent_graph(
+            gcs_ingestion_settings["bucket_name"],
+            select_player_shard(get_top_player_list(leaderboards_response, logger), gcs_ingestion_settings.get("shard_index", 0), gcs_ingestion_settings.get("shard_count", 1), logger),
+            year_month_list,
+            gcs_ingestion_settings["request_headers"],
+            logger,
+            max_depth=gcs_ingestion_settings.get("crawl_max_depth", 1),
+            request_budget=gcs_ingestion_settings.get("crawl_request_budget", 2000),
+            max_in_flight=gcs_ingestion_settings.get("max_in_flight_requests", 8),
+            session=chess_api_session,
+            compression=gcs_ingestion_settings.get("compression"),
+            zstd_dict=zstd_dictionary,
+            shard_index=gcs_ingestion_settings.get("shard_index", 0),
+            shard_count=gcs_ingestion_settings.get("shard_count", 1)
+        )
     return
 
 
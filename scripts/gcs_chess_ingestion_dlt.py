@@ -11,17 +11,20 @@ def _():
     import sys
     import json
     import logging
+    import threading
     from datetime import date, datetime, timedelta
     from dateutil.relativedelta import relativedelta
 
     # DLT Library
     import dlt
+    from dlt.destinations.adapters import bigquery_adapter
 
     # Google Libraries
     import google.cloud.logging as cloud_logging
     from google.cloud import storage
 
     return (
+        bigquery_adapter,
         cloud_logging,
         date,
         datetime,
@@ -32,6 +35,7 @@ def _():
         relativedelta,
         storage,
         sys,
+        threading,
         timedelta,
     )
 
@@ -51,11 +55,20 @@ def _(sys):
     from chess_ingestion import generate_year_month_list
     from chess_ingestion import get_top_player_list
     from chess_ingestion import exponential_backoff_request
+    from chess_ingestion import create_chess_api_session
+    from chess_ingestion import PlayerPeriodBitmaps
+    from chess_ingestion import CHESS_API_BASE_URL
+
+    from chess_transform import flatten_game_record
 
     return (
+        CHESS_API_BASE_URL,
+        PlayerPeriodBitmaps,
         append_to_trigger_bq_dataset,
         create_bq_run_monitor_datasets,
+        create_chess_api_session,
         exponential_backoff_request,
+        flatten_game_record,
         generate_year_month_list,
         get_top_player_list,
         initialise_cloud_logger,
@@ -93,6 +106,12 @@ def _(
             "app_env": "DEV",
             "start_date": "2025-08-01",
             "end_date": "2025-08-01",
+            "extract_workers": 8,
+            "state_retention_months": 12,
+            "output_format": "jsonl",
+            "destination": "filesystem",
+            "bq_dataset_name": "chess_dlt",
+            "location": "EU",
             "request_headers": {
                 "User-Agent": "gcs_chess_ingestion_dlt.py (Python 3.11) (username: filiplivancic; contact: filiplivancic@gmail.com)"
             }
@@ -122,6 +141,9 @@ def _(
 
         log_printer("Alerting functionality activated", logger)
 
+    # Thread pool dlt uses to evaluate deferred work items (per-player archive fetches)
+    os.environ["EXTRACT__WORKERS"] = str(dlt_ingestion_settings.get("extract_workers", 8))
+
     return (
         cloud_scheduler_dict,
         config_source,
@@ -138,8 +160,17 @@ def _(end_date, start_date):
     return
 
 
+@app.cell
+def _(create_chess_api_session, dlt_ingestion_settings):
+    # Pooled keep-alive session shared by the leaderboard and the parallel player requests
+    chess_api_session = create_chess_api_session(pool_maxsize=dlt_ingestion_settings.get("extract_workers", 8))
+    return (chess_api_session,)
+
+
 @app.cell
 def _(
+    CHESS_API_BASE_URL,
+    chess_api_session,
     datetime,
     dlt,
     dlt_ingestion_settings,
@@ -152,11 +183,12 @@ def _(
     def fetch_leaderboards():
         """Fetch current Chess.com leaderboards"""
         log_printer('Requesting the latest leaderboards', logger)
-        leaderboards_url = 'https://api.chess.com/pub/leaderboards'
+        leaderboards_url = f'{CHESS_API_BASE_URL}/leaderboards'
         leaderboards_response = exponential_backoff_request(
             leaderboards_url,
             dlt_ingestion_settings["request_headers"],
-            logger
+            logger,
+            session=chess_api_session
         )
 
         if leaderboards_response:
@@ -170,6 +202,9 @@ def _(
 
 @app.cell
 def _(
+    CHESS_API_BASE_URL,
+    PlayerPeriodBitmaps,
+    chess_api_session,
     dlt,
     dlt_ingestion_settings,
     exponential_backoff_request,
@@ -177,6 +212,8 @@ def _(
     get_top_player_list,
     log_printer,
     logger,
+    relativedelta,
+    threading,
 ):
     # Define DLT resource for player game data with idempotency
     @dlt.resource(name="player_games", write_disposition="append")
@@ -185,6 +222,10 @@ def _(
         Fetch Chess.com player game archives for specified date range
         Uses DLT state management for idempotency - skips already-fetched combinations
 
+        Processed combinations are kept as one bitmap per period over a player index
+        (PlayerPeriodBitmaps), and each player's remaining periods are yielded as a
+        deferred work item so dlt fetches players in parallel on its extract workers.
+
         Args:
             leaderboards_data: Leaderboard data to extract player list
             start_date: Start date for game archives
@@ -208,86 +249,181 @@ def _(
 
         # Access DLT's state to track processed combinations
         state = dlt.current.source_state()
-        if "processed_combinations" not in state:
-            state["processed_combinations"] = set()
-
-        processed = state["processed_combinations"]
-
-        # Calculate total and remaining requests
-        all_combinations = [(player, period) for player in top_player_list for period in year_month_list]
-        remaining_combinations = [
-            (player, period) for player, period in all_combinations
-            if f"{player}|{period}" not in processed
-        ]
+        processed = PlayerPeriodBitmaps.from_state(state.get("processed_combination_bitmaps"))
+
+        # Migrate the legacy "player|period" string list into the bitmaps once
+        for combination in state.pop("processed_combinations", None) or []:
+            player, period = combination.split("|")
+            processed.mark_processed(player, period)
+
+        # Keep state flat as months accumulate - periods older than the retention window are dropped
+        oldest_period = (start_date.replace(day=1) - relativedelta(months=dlt_ingestion_settings.get("state_retention_months", 12))).strftime("%Y/%m")
+        pruned_periods = processed.prune_periods(oldest_period)
+        state["processed_combination_bitmaps"] = processed.to_state()
+
+        # Calculate remaining periods per player
+        remaining_by_player = {
+            player: [period for period in year_month_list if not processed.is_processed(player, period)]
+            for player in top_player_list
+        }
+        remaining_by_player = {player: periods for player, periods in remaining_by_player.items() if periods}
 
-        total_combinations = len(all_combinations)
-        remaining_count = len(remaining_combinations)
+        total_combinations = len(top_player_list) * len(year_month_list)
+        remaining_count = sum(len(periods) for periods in remaining_by_player.values())
         already_processed = total_combinations - remaining_count
 
         log_printer(f"Total combinations: {total_combinations}", logger)
         log_printer(f"Already processed: {already_processed}", logger)
-        log_printer(f"Remaining to fetch: {remaining_count}", logger)
+        log_printer(f"Remaining to fetch: {remaining_count} across {len(remaining_by_player)} players", logger)
+        log_printer(f"State periods pruned (before {oldest_period}): {pruned_periods}", logger)
+
+        # The bitmaps are serialised into state once, by whichever deferred fetch finishes last
+        pending_fetches = [len(remaining_by_player)]
+        pending_fetches_lock = threading.Lock()
+
+        @dlt.defer
+        def fetch_player_periods(player, periods):
+            """Fetch one player's remaining archives - evaluated in parallel by dlt"""
+            records = []
+            for period in periods:
+                url = f"{CHESS_API_BASE_URL}/player/{player}/games/{period}"
+
+                games_response = exponential_backoff_request(
+                    url,
+                    dlt_ingestion_settings["request_headers"],
+                    logger,
+                    session=chess_api_session
+                )
+
+                if games_response:
+                    data = games_response.json()
+                    # Add metadata to track the data source
+                    data["_player"] = player
+                    data["_period"] = period
+                    data["_url"] = url
+                    records.append(data)
+                else:
+                    # Even if request failed (404 or error), mark as processed to avoid re-attempting
+                    log_printer(f"Marking {player}|{period} as processed despite failed request", logger)
+
+                processed.mark_processed(player, period)
+
+            with pending_fetches_lock:
+                pending_fetches[0] -= 1
+                if pending_fetches[0] == 0:
+                    state["processed_combination_bitmaps"] = processed.to_state()
+            return records
 
         # Fetch games for remaining player/period combinations
-        completed_requests = 0
+        for player, periods in remaining_by_player.items():
+            yield fetch_player_periods(player, periods)
 
-        for player, period in remaining_combinations:
-            url = f"https://api.chess.com/pub/player/{player}/games/{period}"
+        log_printer(f"Queued {len(remaining_by_player)} deferred player fetches", logger)
 
-            games_response = exponential_backoff_request(
-                url,
-                dlt_ingestion_settings["request_headers"],
-                logger
-            )
+    return (fetch_player_games,)
+
+
+@app.cell
+def _(dlt, flatten_game_record):
+    # Flat, typed games table for columnar output - one table per game month (games_YYYY_MM)
+    games_columns = {
+        "game_id":        {"data_type": "bigint",    "nullable": False},
+        "url":            {"data_type": "text",      "nullable": False},
+        "game_date":      {"data_type": "date",      "nullable": False},
+        "game_month":     {"data_type": "date",      "nullable": False},
+        "ingested_dt":    {"data_type": "timestamp", "nullable": False},
+        "time_control":   {"data_type": "text"},
+        "end_time":       {"data_type": "bigint",    "nullable": False},
+        "rated":          {"data_type": "bool"},
+        "time_class":     {"data_type": "text"},
+        "rules":          {"data_type": "text"},
+        "white_uuid":     {"data_type": "text"},
+        "white_username": {"data_type": "text"},
+        "white_rating":   {"data_type": "bigint"},
+        "white_result":   {"data_type": "text"},
+        "black_uuid":     {"data_type": "text"},
+        "black_username": {"data_type": "text"},
+        "black_rating":   {"data_type": "bigint"},
+        "black_result":   {"data_type": "text"},
+        "accuracy_white": {"data_type": "double"},
+        "accuracy_black": {"data_type": "double"},
+        "eco":            {"data_type": "text"},
+        "opening":        {"data_type": "text"},
+    }
+
+    @dlt.transformer(name="games", write_disposition="append", columns=games_columns)
+    def flatten_player_games(archives):
+        """
+        Normalise fetched player archives into flat game rows, routed to a table per month
 
-            completed_requests += 1
-            if completed_requests % 50 == 0:
-                log_printer(f"Progress: {completed_requests}/{remaining_count} requests completed", logger)
+        Args:
+            archives: Archive record (or list of records) yielded by fetch_player_games
+        """
+        rows_by_month = {}
+        for archive in archives if isinstance(archives, list) else [archives]:
+            for game in archive.get("games", []):
+                row = flatten_game_record(game)
+                rows_by_month.setdefault(row["game_month"], []).append(row)
 
-            if games_response:
-                data = games_response.json()
-                # Add metadata to track the data source
-                data["_player"] = player
-                data["_period"] = period
-                data["_url"] = url
+        for game_month, rows in rows_by_month.items():
+            yield dlt.mark.with_table_name(rows, f"games_{game_month:%Y_%m}")
 
-                # Mark this combination as processed
-                state["processed_combinations"].add(f"{player}|{period}")
+    @dlt.transformer(name="games", write_disposition="merge", primary_key="game_id", columns=games_columns)
+    def merge_player_games(archives):
+        """
+        Normalise fetched player archives into flat game rows merged on game_id
 
-                yield data
-            else:
-                # Even if request failed (404 or error), mark as processed to avoid re-attempting
-                log_printer(f"Marking {player}|{period} as processed despite failed request", logger)
-                state["processed_combinations"].add(f"{player}|{period}")
+        A game appears in both players' archives - rows sharing a game_id collapse
+        during the merge load instead of needing a dedup pass against the games table.
 
-        log_printer(f"Completed fetching {completed_requests} new player/period combinations", logger)
+        Args:
+            archives: Archive record (or list of records) yielded by fetch_player_games
+        """
+        for archive in archives if isinstance(archives, list) else [archives]:
+            yield [flatten_game_record(game) for game in archive.get("games", [])]
 
-    return (fetch_player_games,)
+    return flatten_player_games, games_columns, merge_player_games
 
 
 @app.cell
 def _(
+    bigquery_adapter,
     dlt,
     dlt_ingestion_settings,
     end_date,
     fetch_leaderboards,
     fetch_player_games,
+    flatten_player_games,
     log_printer,
     logger,
+    merge_player_games,
     start_date,
 ):
-    # Configure DLT pipeline with GCS filesystem destination
+    # Configure DLT pipeline - GCS filesystem destination, or BigQuery staged through the same bucket
     log_printer("Configuring DLT pipeline", logger)
+    use_bigquery = dlt_ingestion_settings.get("destination", "filesystem") == "bigquery"
+
+    if use_bigquery:
+        pipeline = dlt.pipeline(
+            pipeline_name="chess_api_ingestion_bigquery",
+            destination=dlt.destinations.bigquery(location=dlt_ingestion_settings.get("location", "EU")),
+            staging=dlt.destinations.filesystem(
+                bucket_url=f"gs://{dlt_ingestion_settings['bucket_name']}/dlt_staging"
+            ),
+            dataset_name=dlt_ingestion_settings.get("bq_dataset_name", "chess_dlt")
+        )
+        destination_description = f"BigQuery dataset {dlt_ingestion_settings['project_id']}.{dlt_ingestion_settings.get('bq_dataset_name', 'chess_dlt')}"
+    else:
+        pipeline = dlt.pipeline(
+            pipeline_name="chess_api_ingestion",
+            destination=dlt.destinations.filesystem(
+                bucket_url=f"gs://{dlt_ingestion_settings['bucket_name']}"
+            ),
+            dataset_name="chess_data"
+        )
+        destination_description = f"gs://{dlt_ingestion_settings['bucket_name']}/chess_data"
 
-    pipeline = dlt.pipeline(
-        pipeline_name="chess_api_ingestion",
-        destination=dlt.destinations.filesystem(
-            bucket_url=f"gs://{dlt_ingestion_settings['bucket_name']}"
-        ),
-        dataset_name="chess_data"
-    )
-
-    log_printer(f"DLT Pipeline configured to write to: gs://{dlt_ingestion_settings['bucket_name']}/chess_data", logger)
+    log_printer(f"DLT Pipeline configured to write to: {destination_description}", logger)
 
     # Execute the pipeline
     log_printer("Starting DLT pipeline execution", logger)
@@ -301,20 +437,39 @@ def _(
     if leaderboards_data:
         log_printer("Leaderboards fetched successfully", logger)
 
-        # Run the pipeline with both resources
-        load_info = pipeline.run(
-            [
-                fetch_leaderboards(),
-                fetch_player_games(leaderboards_data, start_date, end_date)
-            ]
-        )
+        if use_bigquery:
+            # Flat games merged on game_id into a game_date partitioned table, loaded from Parquet staging files
+            load_info = pipeline.run(
+                [
+                    fetch_leaderboards(),
+                    bigquery_adapter(fetch_player_games(leaderboards_data, start_date, end_date) | merge_player_games, partition="game_date")
+                ],
+                loader_file_format="parquet"
+            )
+        elif dlt_ingestion_settings.get("output_format", "jsonl") == "parquet":
+            # Flat typed games as Parquet, partitioned into one table directory per month
+            load_info = pipeline.run(
+                [
+                    fetch_leaderboards(),
+                    fetch_player_games(leaderboards_data, start_date, end_date) | flatten_player_games
+                ],
+                loader_file_format="parquet"
+            )
+        else:
+            # Run the pipeline with both resources
+            load_info = pipeline.run(
+                [
+                    fetch_leaderboards(),
+                    fetch_player_games(leaderboards_data, start_date, end_date)
+                ]
+            )
 
         log_printer(f"DLT Pipeline execution completed: {load_info}", logger)
-        log_printer(f"Data loaded to: gs://{dlt_ingestion_settings['bucket_name']}/chess_data", logger)
+        log_printer(f"Data loaded to: {destination_description}", logger)
     else:
         log_printer("Failed to fetch leaderboards, aborting pipeline", logger, severity="ERROR")
 
-    return leaderboards_data, load_info, pipeline
+    return destination_description, leaderboards_data, load_info, pipeline, use_bigquery
 
 
 if __name__ == "__main__":